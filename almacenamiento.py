@@ -0,0 +1,128 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Sin pyarrow se sigue leyendo el CSV directamente
+    pa = None
+    feather = None
+
+# Extensión de las copias columnares (Arrow IPC / Feather v2)
+EXTENSION_COLUMNAR = '.arrow'
+
+# Claves de metadatos que guardan la huella del CSV de origen
+_META_MTIME = b'origen_mtime_ns'
+_META_TAMAÑO = b'origen_tamano'
+_META_SHA256 = b'origen_sha256'
+
+
+def ruta_columnar(ruta_csv):
+    """Ruta de la copia columnar asociada a un CSV"""
+    return os.path.splitext(ruta_csv)[0] + EXTENSION_COLUMNAR
+
+
+def leer_tabla(ruta_csv, esquema=None):
+    """
+    Lee una tabla del proyecto a partir de su ruta CSV.
+
+    Si pyarrow está disponible, el CSV se convierte una sola vez a Arrow IPC sin
+    comprimir y las lecturas siguientes se hacen con memoria mapeada. La copia se
+    reconstruye cuando cambia el CSV: primero se compara mtime y tamaño, y solo si
+    difieren se calcula el SHA-256 para descartar cambios de fecha sin contenido
+    nuevo. Si el CSV no existe pero sí la copia columnar (por ejemplo, porque el
+    generador la escribió directamente), se lee esa copia.
+
+    esquema es una función opcional (ver esquema.py) que tipa el DataFrame; se
+    aplica antes de escribir la copia columnar, de modo que esta ya guarda
+    categorías y enteros pequeños, y otra vez tras leer por si la copia es previa.
+    """
+    esquema = esquema or (lambda df: df)
+
+    if feather is None:
+        return esquema(pd.read_csv(ruta_csv))
+
+    destino = ruta_columnar(ruta_csv)
+    if not os.path.exists(ruta_csv):
+        if os.path.exists(destino):
+            return esquema(_leer_columnar(destino))
+        return pd.read_csv(ruta_csv)  # Propaga el FileNotFoundError habitual
+
+    estado = os.stat(ruta_csv)
+    metadatos = _leer_metadatos(destino)
+
+    if metadatos is None:
+        _convertir_csv(ruta_csv, destino, estado, esquema)
+    elif _META_SHA256 not in metadatos:
+        # Copia escrita directamente por el generador: manda la más reciente
+        if estado.st_mtime_ns > os.stat(destino).st_mtime_ns:
+            _convertir_csv(ruta_csv, destino, estado, esquema)
+    elif (metadatos.get(_META_MTIME) != str(estado.st_mtime_ns).encode()
+          or metadatos.get(_META_TAMAÑO) != str(estado.st_size).encode()):
+        if metadatos[_META_SHA256] != _sha256(ruta_csv).encode():
+            _convertir_csv(ruta_csv, destino, estado, esquema)
+        else:
+            # Mismo contenido con otra fecha: solo se actualiza la huella
+            tabla = feather.read_table(destino, memory_map=True)
+            _escribir_columnar(tabla, destino, _huella(ruta_csv, estado))
+
+    return esquema(_leer_columnar(destino))
+
+
+def guardar_tabla(df, ruta):
+    """
+    Guarda un DataFrame en CSV o, si la ruta termina en .arrow/.feather, en Arrow IPC.
+    """
+    if os.path.splitext(ruta)[1] in (EXTENSION_COLUMNAR, '.feather'):
+        if feather is None:
+            raise ImportError("Se necesita pyarrow para escribir el formato columnar")
+        _escribir_columnar(pa.Table.from_pandas(df, preserve_index=False), ruta)
+    else:
+        df.to_csv(ruta, index=False)
+
+
+def _leer_columnar(ruta):
+    return feather.read_table(ruta, memory_map=True).to_pandas()
+
+
+def _leer_metadatos(ruta):
+    """Metadatos del esquema de la copia columnar, o None si no existe o está dañada"""
+    try:
+        with pa.memory_map(ruta) as fuente:
+            return pa.ipc.open_file(fuente).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def _convertir_csv(ruta_csv, destino, estado, esquema):
+    tabla = pa.Table.from_pandas(esquema(pd.read_csv(ruta_csv)), preserve_index=False)
+    _escribir_columnar(tabla, destino, _huella(ruta_csv, estado))
+
+
+def _escribir_columnar(tabla, destino, huella=None):
+    """Escribe sin compresión (para poder mapear en memoria) y reemplaza de forma atómica"""
+    if huella is not None:
+        tabla = tabla.replace_schema_metadata({**(tabla.schema.metadata or {}), **huella})
+    # Único por proceso e hilo: varios hilos de refresco pueden convertir el mismo CSV a la vez
+    temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(tabla, temporal, compression='uncompressed')
+    os.replace(temporal, destino)
+
+
+def _huella(ruta_csv, estado):
+    return {
+        _META_MTIME: str(estado.st_mtime_ns),
+        _META_TAMAÑO: str(estado.st_size),
+        _META_SHA256: _sha256(ruta_csv)
+    }
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
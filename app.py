@@ -1,15 +1,19 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
+from cache_graficos import CacheGraficos
+from datos_dashboard import usar_fuente
+from graficos import construir_grafico, datos_grafico
+from indice_datos import obtener_grupo, obtener_año
+from instrumentacion import Instrumentacion
 
-# Cargar datos
-@st.cache_data
-def load_data():
-    df_pred = pd.read_csv('predicciones_alerta_vih_2025_2030.csv')
-    df_hist = pd.read_csv('DATASET_VIH.csv')
-    return df_pred, df_hist
+# Tiempos por etapa (opcional: ?perf=1 en la URL o VIH_INSTRUMENTACION=1)
+instrumentacion = Instrumentacion.desde_streamlit('app.py')
 
-df_pred, df_hist = load_data()
+with instrumentacion.etapa('Carga de datos'):
+    instantanea = usar_fuente('local')
+df_pred, df_hist, _ = instantanea['datos']
+indice = instantanea['indice']
+instrumentacion.anotar('Versión de datos', f"{instantanea['version']} ({indice['version']})")
 
 # Configuración de la página
 st.set_page_config(
@@ -58,40 +62,71 @@ sexo = st.sidebar.selectbox(
     key="sex_selector"  # Agregar key único
 )
 
-tipo_grafico = st.sidebar.radio(
-    "Tipo de gráfico:",
-    options=["Barras", "Líneas", "Área"],
-    index=0,
-    key="chart_type_selector"  # Agregar key único
-)
-
 # --- Filtrar datos (CORREGIDO) ---
 def get_filtered_data(departamento, sexo):
     """
     Filtra los datos por departamento y sexo.
     No filtra por año aquí para mantener todos los datos disponibles.
+    Las filas salen del índice ya ordenadas por año y no deben modificarse.
     """
-    # Filtrar datos históricos
-    hist_filtrado = df_hist[
-        (df_hist['Departamento'] == departamento) &
-        (df_hist['Sexo'] == sexo)
-    ].copy()
-    
-    # Filtrar datos de predicción
-    pred_filtrado = df_pred[
-        (df_pred['Departamento'] == departamento) &
-        (df_pred['Sexo'] == sexo)
-    ].copy()
+    hist_filtrado = obtener_grupo(indice, 'hist', departamento, sexo)
+    pred_filtrado = obtener_grupo(indice, 'pred', departamento, sexo)
     
     return hist_filtrado, pred_filtrado
 
+# Los datos por departamento y sexo no dependen del año: se guardan por
+# (departamento, sexo, versión de los datos) y cambiar de año no los reconstruye
+@st.cache_resource(max_entries=256)
+def datos_departamento(departamento, sexo, version):
+    """Histórico, predicciones y tabla del gráfico de un departamento y sexo (no deben modificarse)"""
+    hist_filtrado, pred_filtrado = get_filtered_data(departamento, sexo)
+    return hist_filtrado, pred_filtrado, datos_grafico(hist_filtrado, pred_filtrado)
+
 # Obtener datos filtrados
-hist_filtrado, pred_filtrado = get_filtered_data(departamento, sexo)
+with instrumentacion.etapa('Filtrado'):
+    hist_filtrado, pred_filtrado, df_completo = datos_departamento(departamento, sexo, indice['version'])
+
+# Especificaciones de gráficos ya construidas, compartidas entre sesiones
+@st.cache_resource
+def get_cache_graficos():
+    return CacheGraficos(capacidad=256)
+
+cache_graficos = get_cache_graficos()
+
+# Secciones que se vuelven a ejecutar solas cuando cambia un widget propio (st.fragment).
+# Con versiones de Streamlit sin fragmentos se ejecutan como funciones normales.
+fragmento = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda funcion: funcion)
+
+@fragmento
+def seccion_grafico(df_completo, year, departamento, sexo, prom_hist, casos_pred):
+    """Selector del tipo de gráfico y el gráfico; cambiar el tipo solo vuelve a dibujar esta sección"""
+    # Instrumentación propia: al volver a ejecutarse sola, la del script ya terminó
+    instrumentacion_grafico = Instrumentacion.desde_streamlit('app.py:grafico')
+    tipo_grafico = st.radio(
+        "Tipo de gráfico:",
+        options=["Barras", "Líneas", "Área"],
+        index=0,
+        horizontal=True,
+        key="chart_type_selector"  # Agregar key único
+    )
+    st.subheader(f"Visualización: {tipo_grafico}")
+
+    clave_grafico = ('app', departamento, sexo, year, tipo_grafico, indice['version'])
+    fallos_previos = cache_graficos.fallos
+    with instrumentacion_grafico.etapa('Construcción del gráfico'):
+        spec = cache_graficos.obtener(
+            clave_grafico,
+            lambda: construir_grafico(tipo_grafico, df_completo, year, departamento, sexo, prom_hist, casos_pred).to_dict()
+        )
+    instrumentacion_grafico.anotar('Caché de gráficos', 'fallo' if cache_graficos.fallos > fallos_previos else 'acierto')
+    with instrumentacion_grafico.etapa('Render del gráfico'):
+        st.vega_lite_chart(spec, use_container_width=True)
+    instrumentacion_grafico.finalizar()
 
 # --- Mostrar resultados ---
 if not pred_filtrado.empty:
     # Obtener datos para el año seleccionado (CORREGIDO)
-    datos_año = pred_filtrado[pred_filtrado['Anio'] == year]
+    datos_año = obtener_año(indice, 'pred', year, departamento, sexo)
     
     if not datos_año.empty:
         casos_pred = int(datos_año['CasosEstimados_Predichos'].iloc[0])
@@ -119,91 +154,8 @@ if not pred_filtrado.empty:
 
         # --- Gráficos (MEJORADO) ---
         st.markdown("---")
-        st.subheader(f"Visualización: {tipo_grafico}")
 
-        # Preparar datos combinados para visualización
-        df_hist_viz = hist_filtrado[['Anio', 'CasosEstimados']].rename(columns={'CasosEstimados': 'Casos'})
-        df_hist_viz['Tipo'] = 'Histórico'
-        
-        df_pred_viz = pred_filtrado[['Anio', 'CasosEstimados_Predichos']].rename(columns={'CasosEstimados_Predichos': 'Casos'})
-        df_pred_viz['Tipo'] = 'Predicción'
-        
-        df_completo = pd.concat([df_hist_viz, df_pred_viz]).sort_values('Anio').reset_index(drop=True)
-
-        # Gráfico de Barras - Solo año seleccionado
-        if tipo_grafico == "Barras":
-            # Datos para el año seleccionado
-            datos_barras = pd.DataFrame({
-                'Categoría': ['Promedio histórico', f'Predicción {year}'],
-                'Casos': [prom_hist, casos_pred],
-                'Color': ['Promedio', 'Predicción']
-            })
-            
-            chart = alt.Chart(datos_barras).mark_bar(size=60).encode(
-                x=alt.X('Categoría:N', title='', axis=alt.Axis(labelAngle=0)),
-                y=alt.Y('Casos:Q', title='Número de Casos'),
-                color=alt.Color('Color:N', 
-                              scale=alt.Scale(domain=['Promedio', 'Predicción'], 
-                                            range=["#1f77b4", "#ff7f0e"]),
-                              legend=alt.Legend(title="Tipo")),
-                tooltip=['Categoría', 'Casos']
-            ).properties(
-                title=f"Comparación para {departamento} - {sexo} - {year}",
-                width=600,
-                height=400
-            )
-
-        # Gráfico de Líneas
-        elif tipo_grafico == "Líneas":
-            # Resaltar el año seleccionado
-            df_completo['Destacado'] = df_completo['Anio'] == year
-            
-            # Línea base
-            base_chart = alt.Chart(df_completo).mark_line(point=True, strokeWidth=2).encode(
-                x=alt.X('Anio:O', title='Año'),
-                y=alt.Y('Casos:Q', title='Número de Casos'),
-                color=alt.Color('Tipo:N', 
-                              scale=alt.Scale(domain=['Histórico', 'Predicción'], 
-                                            range=['#1f77b4', '#d62728']),
-                              legend=alt.Legend(title="Tipo de Dato")),
-                tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
-            )
-            
-            # Punto destacado para el año seleccionado
-            highlight_chart = alt.Chart(df_completo[df_completo['Destacado']]).mark_circle(
-                size=200, stroke='black', strokeWidth=2
-            ).encode(
-                x='Anio:O',
-                y='Casos:Q',
-                color=alt.Color('Tipo:N', 
-                              scale=alt.Scale(domain=['Histórico', 'Predicción'], 
-                                            range=['#1f77b4', '#d62728'])),
-                tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
-            )
-            
-            chart = (base_chart + highlight_chart).properties(
-                title=f"Evolución de casos - {departamento} - {sexo} (Año destacado: {year})",
-                width=700,
-                height=400
-            ).resolve_scale(color='independent')
-
-        # Gráfico de Área
-        else:  # Área
-            chart = alt.Chart(df_completo).mark_area(opacity=0.7, line=True).encode(
-                x=alt.X('Anio:O', title='Año'),
-                y=alt.Y('Casos:Q', title='Número de Casos'),
-                color=alt.Color('Tipo:N', 
-                              scale=alt.Scale(domain=['Histórico', 'Predicción'], 
-                                            range=['#1f77b4', '#d62728']),
-                              legend=alt.Legend(title="Tipo de Dato")),
-                tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
-            ).properties(
-                title=f"Tendencia de casos - {departamento} - {sexo}",
-                width=700,
-                height=400
-            )
-
-        st.altair_chart(chart, use_container_width=True)
+        seccion_grafico(df_completo, year, departamento, sexo, prom_hist, casos_pred)
 
         # --- Tabla de datos filtrada por año ---
         st.markdown("---")
@@ -213,7 +165,7 @@ if not pred_filtrado.empty:
         datos_tabla = []
         
         # Datos históricos para el año
-        hist_año = hist_filtrado[hist_filtrado['Anio'] == year]
+        hist_año = obtener_año(indice, 'hist', year, departamento, sexo)
         if not hist_año.empty:
             datos_tabla.append({
                 'Año': year,
@@ -222,7 +174,7 @@ if not pred_filtrado.empty:
             })
         
         # Datos de predicción para el año
-        pred_año = pred_filtrado[pred_filtrado['Anio'] == year]
+        pred_año = obtener_año(indice, 'pred', year, departamento, sexo)
         if not pred_año.empty:
             datos_tabla.append({
                 'Año': year,
@@ -232,7 +184,8 @@ if not pred_filtrado.empty:
         
         if datos_tabla:
             df_tabla = pd.DataFrame(datos_tabla)
-            st.dataframe(df_tabla, use_container_width=True)
+            with instrumentacion.etapa('Render de la tabla'):
+                st.dataframe(df_tabla, use_container_width=True)
         else:
             st.warning(f"No hay datos disponibles para el año {year}")
 
@@ -274,7 +227,6 @@ with col2:
     st.write(f"- Año seleccionado: {year}")
     st.write(f"- Departamento: {departamento}")
     st.write(f"- Sexo: {sexo}")
-    st.write(f"- Tipo de gráfico: {tipo_grafico}")
 
 # Pie de página
 st.markdown("---")
@@ -287,3 +239,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# Panel de tiempos (solo si la instrumentación está activa)
+instrumentacion.finalizar()
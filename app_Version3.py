@@ -1,148 +1,30 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
-import numpy as np
-
-# Cargar datos
-@st.cache_data
-def load_data():
-    try:
-        # Usar el nuevo dataset simulado
-        url = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/predicciones_alerta_vih_2025_2030_simulado-sJhB4luINPdUPcTCLKSgmVsfrVb0ui.csv"
-        
-        # Intentar cargar desde URL primero
-        try:
-            import requests
-            from io import StringIO
-            response = requests.get(url)
-            response.raise_for_status()
-            df_pred = pd.read_csv(StringIO(response.text))
-            
-            # Corregir tipos de datos
-            df_pred['Anio'] = pd.to_numeric(df_pred['Anio'], errors='coerce')
-            df_pred['CasosEstimados_Predichos'] = pd.to_numeric(df_pred['CasosEstimados_Predichos'], errors='coerce')
-            df_pred['PromHist'] = pd.to_numeric(df_pred['PromHist'], errors='coerce')
-            df_pred['Alerta'] = df_pred['Alerta'].map({'True': True, 'False': False, True: True, False: False})
-            
-            st.success("✅ Datos cargados desde el dataset simulado mejorado")
-            
-        except:
-            # Fallback a archivo local si existe
-            df_pred = pd.read_csv('predicciones_alerta_vih_2025_2030_simulado_corregido.csv')
-        
-        # Intentar cargar datos históricos
-        try:
-            df_hist = pd.read_csv('DATASET_VIH.csv')
-        except:
-            df_hist = pd.DataFrame()  # Datos históricos vacíos si no existen
-        
-        return df_pred, df_hist
-        
-    except Exception as e:
-        st.error(f"Error cargando datos: {e}")
-        return pd.DataFrame(), pd.DataFrame()
-
-# Función para generar datos de ejemplo si no existen los archivos
-@st.cache_data
-def generar_datos_ejemplo():
-    """Genera datos de ejemplo con variaciones por año"""
-    
-    departamentos = ['Amazonas', 'Ancash', 'Apurimac', 'Arequipa', 'Ayacucho', 'Cajamarca', 
-                    'Callao', 'Cusco', 'Huancavelica', 'Huanuco', 'Ica', 'Junin', 
-                    'La Libertad', 'Lambayeque', 'Lima', 'Loreto', 'Madre de Dios', 
-                    'Moquegua', 'Pasco', 'Piura', 'Puno', 'San Martin', 'Tacna', 'Tumbes', 'Ucayali']
-    
-    sexos = ['Masculino', 'Femenino']
-    años_pred = [2025, 2026, 2027, 2028, 2029, 2030]
-    
-    # Valores base por departamento (aproximados)
-    valores_base = {
-        'Lima': {'Masculino': 3500, 'Femenino': 900},
-        'Callao': {'Masculino': 480, 'Femenino': 120},
-        'Loreto': {'Masculino': 550, 'Femenino': 140},
-        'Arequipa': {'Masculino': 320, 'Femenino': 80},
-        'La Libertad': {'Masculino': 350, 'Femenino': 90},
-        'Ica': {'Masculino': 280, 'Femenino': 70},
-        'Lambayeque': {'Masculino': 220, 'Femenino': 55},
-        'Junin': {'Masculino': 190, 'Femenino': 48},
-        'Ucayali': {'Masculino': 190, 'Femenino': 48},
-        'Ancash': {'Masculino': 160, 'Femenino': 42},
-        'Piura': {'Masculino': 160, 'Femenino': 42},
-        'Amazonas': {'Masculino': 135, 'Femenino': 35},
-        'Cusco': {'Masculino': 125, 'Femenino': 32},
-        'San Martin': {'Masculino': 125, 'Femenino': 32},
-        'Huanuco': {'Masculino': 110, 'Femenino': 28},
-        'Cajamarca': {'Masculino': 95, 'Femenino': 24},
-        'Madre de Dios': {'Masculino': 95, 'Femenino': 24},
-        'Puno': {'Masculino': 95, 'Femenino': 24},
-        'Ayacucho': {'Masculino': 80, 'Femenino': 20},
-        'Tacna': {'Masculino': 80, 'Femenino': 20},
-        'Apurimac': {'Masculino': 65, 'Femenino': 17},
-        'Moquegua': {'Masculino': 65, 'Femenino': 17},
-        'Tumbes': {'Masculino': 65, 'Femenino': 17},
-        'Huancavelica': {'Masculino': 50, 'Femenino': 13},
-        'Pasco': {'Masculino': 50, 'Femenino': 13}
-    }
-    
-    # Factores de variación por año
-    factores_año = {
-        2025: 1.02,  # +2%
-        2026: 0.98,  # -2%
-        2027: 1.05,  # +5%
-        2028: 1.08,  # +8%
-        2029: 0.95,  # -5%
-        2030: 1.03   # +3%
-    }
-    
-    predicciones = []
-    np.random.seed(42)  # Para reproducibilidad
-    
-    for dept in departamentos:
-        for sexo in sexos:
-            base_value = valores_base.get(dept, {'Masculino': 100, 'Femenino': 25})[sexo]
-            prom_hist = base_value * 0.95  # Promedio histórico ligeramente menor
-            
-            for año in años_pred:
-                # Aplicar factor del año + variación aleatoria
-                factor = factores_año[año]
-                variacion = np.random.normal(0, 0.1)  # ±10% de variación
-                
-                casos_pred = int(base_value * factor * (1 + variacion))
-                casos_pred = max(1, casos_pred)  # Mínimo 1 caso
-                
-                # Generar alerta si supera el promedio + 20%
-                alerta = casos_pred > (prom_hist * 1.2)
-                
-                predicciones.append({
-                    'Anio': año,
-                    'Departamento': dept,
-                    'Sexo': sexo,
-                    'CasosEstimados_Predichos': casos_pred,
-                    'PromHist': round(prom_hist, 1),
-                    'Alerta': alerta
-                })
-    
-    return pd.DataFrame(predicciones)
-
-# Intentar cargar datos, si no existen generar ejemplos
-try:
-    df_pred, df_hist = load_data()
-    if df_pred.empty:
-        st.warning("⚠️ Generando datos de ejemplo con variaciones por año...")
-        df_pred = generar_datos_ejemplo()
-        # Guardar para uso futuro
-        df_pred.to_csv('predicciones_alerta_vih_2025_2030.csv', index=False)
-        st.success("✅ Datos de ejemplo generados con variaciones por año")
-except:
-    st.warning("⚠️ Generando datos de ejemplo...")
-    df_pred = generar_datos_ejemplo()
-    df_hist = pd.DataFrame()  # Datos históricos vacíos para el ejemplo
+from cache_graficos import CacheGraficos
+from datos_dashboard import usar_fuente
+from graficos import construir_grafico_anual
+from indice_datos import obtener_grupo, obtener_año
+from cubo_agregados import obtener_celda, totales_por_año
+from instrumentacion import Instrumentacion
+
+# Tiempos por etapa (opcional: ?perf=1 en la URL o VIH_INSTRUMENTACION=1)
+instrumentacion = Instrumentacion.desde_streamlit('app_Version3.py')
+
+with instrumentacion.etapa('Carga de datos'):
+    instantanea = usar_fuente('remota')
+df_pred, df_hist, avisos = instantanea['datos']
+for tipo, texto in avisos:
+    getattr(st, tipo)(texto)
 
 # Verificar que los datos se cargaron correctamente
 if df_pred.empty:
     st.error("❌ No se pudieron cargar los datos.")
     st.stop()
 
+indice = instantanea['indice']
+cubo = instantanea['cubo']
+instrumentacion.anotar('Versión de datos', f"{instantanea['version']} ({indice['version']})")
+
 # Configuración de la página
 st.set_page_config(
     page_title="Sistema de Alerta Temprana VIH - Perú",
@@ -197,9 +79,10 @@ available_sex = sorted(df_pred['Sexo'].unique())
 # Mostrar información sobre variaciones por año
 st.sidebar.markdown("---")
 st.sidebar.markdown("**📈 Variaciones por Año:**")
-for año in available_years:
-    casos_año = df_pred[df_pred['Anio'] == año]['CasosEstimados_Predichos'].sum()
-    st.sidebar.write(f"• {año}: {casos_año:,} casos totales")
+with instrumentacion.etapa('Totales por año (barra lateral)'):
+    totales = totales_por_año(cubo)
+    for año, casos_año in zip(totales.index, totales['Casos']):
+        st.sidebar.write(f"• {año}: {casos_año:,} casos totales")
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("**📊 Dataset Simulado:**")
@@ -231,13 +114,6 @@ sexo = st.sidebar.selectbox(
     key="sex_selector"
 )
 
-tipo_grafico = st.sidebar.radio(
-    "📈 Tipo de gráfico:",
-    options=["Barras", "Líneas", "Área"],
-    index=0,
-    key="chart_type_selector"
-)
-
 # Mostrar filtros actuales destacando el año
 st.sidebar.markdown("---")
 st.sidebar.markdown("**🎯 Selección Actual:**")
@@ -246,23 +122,64 @@ st.sidebar.markdown(f"**🏛️ Departamento:** {departamento}")
 st.sidebar.markdown(f"**👥 Sexo:** {sexo}")
 
 # --- Obtener datos para el año seleccionado ---
-def get_year_data(df, year, departamento, sexo):
-    """Filtra los datos para un año, departamento y sexo específicos"""
-    mask = (
-        (df['Anio'] == year) &
-        (df['Departamento'] == departamento) &
-        (df['Sexo'] == sexo)
+def get_year_data(year, departamento, sexo):
+    """Obtiene del índice las predicciones de un año, departamento y sexo específicos"""
+    return obtener_año(indice, 'pred', year, departamento, sexo)
+
+# Los datos de todos los años de un departamento y sexo no dependen del año elegido:
+# se guardan por (departamento, sexo, versión de los datos) y cambiar de año no los reconstruye
+@st.cache_resource(max_entries=256)
+def datos_departamento(departamento, sexo, version):
+    """Predicciones de todos los años y su línea de evolución por año (no deben modificarse)"""
+    all_years_data = obtener_grupo(indice, 'pred', departamento, sexo)
+    linea = (all_years_data['Anio'].astype(str) + ': '
+             + all_years_data['CasosEstimados_Predichos'].map('{:,}'.format) + ' casos')
+    icono = all_years_data['Alerta'].map({True: '🚨', False: '✅'})
+    return all_years_data, linea, icono
+
+with instrumentacion.etapa('Filtrado'):
+    # Obtener datos específicos
+    current_pred = get_year_data(year, departamento, sexo)
+
+    # Obtener datos de todos los años para comparación
+    all_years_data, linea, icono = datos_departamento(departamento, sexo, indice['version'])
+
+# Especificaciones de gráficos ya construidas, compartidas entre sesiones
+@st.cache_resource
+def get_cache_graficos():
+    return CacheGraficos(capacidad=256)
+
+cache_graficos = get_cache_graficos()
+
+# Secciones que se vuelven a ejecutar solas cuando cambia un widget propio (st.fragment).
+# Con versiones de Streamlit sin fragmentos se ejecutan como funciones normales.
+fragmento = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda funcion: funcion)
+
+@fragmento
+def seccion_grafico(all_years_data, year, departamento, sexo, prom_hist):
+    """Selector del tipo de gráfico y el gráfico; cambiar el tipo solo vuelve a dibujar esta sección"""
+    # Instrumentación propia: al volver a ejecutarse sola, la del script ya terminó
+    instrumentacion_grafico = Instrumentacion.desde_streamlit('app_Version3.py:grafico')
+    tipo_grafico = st.radio(
+        "📈 Tipo de gráfico:",
+        options=["Barras", "Líneas", "Área"],
+        index=0,
+        horizontal=True,
+        key="chart_type_selector"
     )
-    return df[mask]
-
-# Obtener datos específicos
-current_pred = get_year_data(df_pred, year, departamento, sexo)
+    st.markdown(f"## 📊 Visualización: {tipo_grafico}")
 
-# Obtener datos de todos los años para comparación
-all_years_data = df_pred[
-    (df_pred['Departamento'] == departamento) &
-    (df_pred['Sexo'] == sexo)
-].sort_values('Anio')
+    clave_grafico = ('v3', departamento, sexo, year, tipo_grafico, indice['version'])
+    fallos_previos = cache_graficos.fallos
+    with instrumentacion_grafico.etapa('Construcción del gráfico'):
+        spec = cache_graficos.obtener(
+            clave_grafico,
+            lambda: construir_grafico_anual(tipo_grafico, all_years_data, year, departamento, sexo, prom_hist).to_dict()
+        )
+    instrumentacion_grafico.anotar('Caché de gráficos', 'fallo' if cache_graficos.fallos > fallos_previos else 'acierto')
+    with instrumentacion_grafico.etapa('Render del gráfico'):
+        st.vega_lite_chart(spec, use_container_width=True)
+    instrumentacion_grafico.finalizar()
 
 # --- Mostrar resultados ---
 if not current_pred.empty:
@@ -270,6 +187,7 @@ if not current_pred.empty:
     casos_pred = int(current_pred['CasosEstimados_Predichos'].iloc[0])
     prom_hist = float(current_pred['PromHist'].iloc[0])
     alerta = current_pred['Alerta'].iloc[0]
+    celda = obtener_celda(cubo, year, departamento, sexo)
     
     # Calcular diferencia y porcentaje
     diferencia = casos_pred - prom_hist
@@ -302,12 +220,9 @@ if not current_pred.empty:
     with col3:
         # Comparar con año anterior si existe
         año_anterior = year - 1
-        casos_anterior = None
         if año_anterior in available_years:
-            data_anterior = get_year_data(df_pred, año_anterior, departamento, sexo)
-            if not data_anterior.empty:
-                casos_anterior = int(data_anterior['CasosEstimados_Predichos'].iloc[0])
-                delta_año = casos_pred - casos_anterior
+            if celda is not None and pd.notna(celda['CasosAnterior']):
+                delta_año = int(celda['Delta'])
                 st.metric(
                     f"📈 vs {año_anterior}", 
                     f"{casos_pred:,}",
@@ -333,22 +248,18 @@ if not current_pred.empty:
         
         with col1:
             st.markdown("**📈 Evolución por Año:**")
-            for _, row in all_years_data.iterrows():
-                año_row = int(row['Anio'])
-                casos_row = int(row['CasosEstimados_Predichos'])
-                alerta_row = row['Alerta']
-                
-                # Destacar el año seleccionado
-                if año_row == year:
-                    st.markdown(f"**➤ {año_row}: {casos_row:,} casos** {'🚨' if alerta_row else '✅'} ⭐")
-                else:
-                    st.markdown(f"   {año_row}: {casos_row:,} casos {'🚨' if alerta_row else '✅'}")
+            # Un solo bloque markdown con una línea por año (ya armadas por departamento);
+            # destacar el año seleccionado
+            lineas = ('**➤ ' + linea + '** ' + icono + ' ⭐').where(
+                all_years_data['Anio'] == year, linea + ' ' + icono
+            )
+            st.markdown('  \n'.join(lineas))
         
         with col2:
             st.markdown("**📊 Estadísticas:**")
-            casos_min = all_years_data['CasosEstimados_Predichos'].min()
-            casos_max = all_years_data['CasosEstimados_Predichos'].max()
-            casos_promedio = all_years_data['CasosEstimados_Predichos'].mean()
+            casos_min = int(celda['Min'])
+            casos_max = int(celda['Max'])
+            casos_promedio = celda['Media']
             
             st.write(f"• **Mínimo:** {casos_min:,} casos")
             st.write(f"• **Máximo:** {casos_max:,} casos")
@@ -357,98 +268,7 @@ if not current_pred.empty:
 
     # --- Gráficos ---
     st.markdown("---")
-    st.markdown(f"## 📊 Visualización: {tipo_grafico}")
-
-    # Gráfico de Barras - Todos los años
-    if tipo_grafico == "Barras":
-        # Preparar datos para el gráfico de barras
-        chart_data = all_years_data.copy()
-        chart_data['Destacado'] = chart_data['Anio'] == year
-        chart_data['Color'] = chart_data.apply(
-            lambda x: f"Año {x['Anio']} ⭐" if x['Destacado'] else f"Año {x['Anio']}", axis=1
-        )
-        
-        chart = alt.Chart(chart_data).mark_bar(size=60).encode(
-            x=alt.X('Anio:O', title='Año'),
-            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
-            color=alt.Color(
-                'Destacado:N',
-                scale=alt.Scale(domain=[True, False], range=['#ff7f0e', '#1f77b4']),
-                legend=alt.Legend(title="Año Seleccionado", labels=["Sí", "No"])
-            ),
-            stroke=alt.condition(
-                alt.datum.Destacado == True,
-                alt.value('black'),
-                alt.value('transparent')
-            ),
-            strokeWidth=alt.condition(
-                alt.datum.Destacado == True,
-                alt.value(3),
-                alt.value(0)
-            ),
-            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
-        ).properties(
-            title=f"Predicciones por Año - {departamento} ({sexo}) - Destacado: {year}",
-            width=700,
-            height=400
-        )
-
-    # Gráfico de Líneas
-    elif tipo_grafico == "Líneas":
-        # Línea base
-        base_chart = alt.Chart(all_years_data).mark_line(point=True, strokeWidth=3).encode(
-            x=alt.X('Anio:O', title='Año'),
-            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
-            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
-        )
-        
-        # Punto destacado para el año seleccionado
-        highlight_data = all_years_data[all_years_data['Anio'] == year]
-        highlight_chart = alt.Chart(highlight_data).mark_circle(
-            size=400, stroke='red', strokeWidth=4, color='orange'
-        ).encode(
-            x='Anio:O',
-            y='CasosEstimados_Predichos:Q',
-            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
-        )
-        
-        # Línea de promedio histórico
-        prom_line = alt.Chart(pd.DataFrame({'y': [prom_hist]})).mark_rule(
-            color='green', strokeDash=[5, 5], strokeWidth=2
-        ).encode(
-            y='y:Q'
-        )
-        
-        chart = (base_chart + highlight_chart + prom_line).properties(
-            title=f"Evolución Temporal - {departamento} ({sexo}) - Año Destacado: {year}",
-            width=800,
-            height=450
-        )
-
-    # Gráfico de Área
-    else:  # Área
-        chart = alt.Chart(all_years_data).mark_area(opacity=0.7, line=True).encode(
-            x=alt.X('Anio:O', title='Año'),
-            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
-            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
-        ).properties(
-            title=f"Tendencia de Casos - {departamento} ({sexo})",
-            width=800,
-            height=450
-        )
-        
-        # Agregar punto destacado
-        highlight_data = all_years_data[all_years_data['Anio'] == year]
-        highlight_point = alt.Chart(highlight_data).mark_circle(
-            size=300, stroke='red', strokeWidth=3, color='orange'
-        ).encode(
-            x='Anio:O',
-            y='CasosEstimados_Predichos:Q'
-        )
-        
-        chart = chart + highlight_point
-
-    st.altair_chart(chart, use_container_width=True)
+    seccion_grafico(all_years_data, year, departamento, sexo, prom_hist)
 
     # Tabla de todos los años
     st.markdown("---")
@@ -461,11 +281,12 @@ if not current_pred.empty:
     # Reordenar columnas
     tabla_años = tabla_años[['Año', 'Casos Predichos', 'Alerta', 'Seleccionado']]
     
-    st.dataframe(
-        tabla_años,
-        use_container_width=True,
-        hide_index=True
-    )
+    with instrumentacion.etapa('Render de la tabla'):
+        st.dataframe(
+            tabla_años,
+            use_container_width=True,
+            hide_index=True
+        )
 
 else:
     st.error("❌ No hay datos disponibles para la combinación seleccionada.")
@@ -498,3 +319,6 @@ st.markdown("""
     Inspirado en la <a href='https://app7.dge.gob.pe/maps/sala_vih/' target='_blank'>Sala Situacional VIH del MINSA Perú</a></p>
 </div>
 """)
+
+# Panel de tiempos (solo si la instrumentación está activa)
+instrumentacion.finalizar()
@@ -0,0 +1,227 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import (
+    AÑOS_PRED, MULTIPLICADOR_ALERTA, calcular_promedios, preparar_simulacion, simular_casos
+)
+from pronostico import METODOS, matriz_series
+
+# Años de predicción por origen (t+1 ... t+HORIZONTE)
+HORIZONTE = 3
+
+# Años mínimos de entrenamiento del primer origen
+MIN_AÑOS_ENTRENAMIENTO = 5
+
+# Nombre del generador por factores actual dentro de los métodos evaluados
+METODO_FACTORES = 'factores'
+
+
+# Series del histórico compartidas con cada trabajador del pool (ver _inicializar_trabajador)
+_Y, _años, _grupos = None, None, None
+
+
+def _validar_horizonte(metodos, horizonte):
+    """El generador por factores solo tiene tablas para len(AÑOS_PRED) años por delante"""
+    if horizonte < 1:
+        raise ValueError(f"El horizonte debe ser al menos 1 (recibido: {horizonte})")
+    if METODO_FACTORES in metodos and horizonte > len(AÑOS_PRED):
+        raise ValueError(
+            f"El método '{METODO_FACTORES}' admite un horizonte de hasta {len(AÑOS_PRED)} años "
+            f"(tablas {AÑOS_PRED[0]}-{AÑOS_PRED[-1]}); recibido: {horizonte}"
+        )
+
+
+def _pronostico_factores(promedios, años_pred, semilla, multiplicador_alerta):
+    """
+    Generador por factores (generar_predicciones) reproducido en un origen pasado.
+
+    Sus tablas están escritas para 2025-2030, así que se aplican por horizonte:
+    el año t+1 usa los factores de 2025, t+2 los de 2026, etc. (brotes incluidos).
+    """
+    años_factores = AÑOS_PRED[:len(años_pred)]
+    base, variacion_total, umbral_alerta, brote_posible = preparar_simulacion(
+        promedios, años_factores, multiplicador_alerta=multiplicador_alerta
+    )
+    casos_pred, alerta = simular_casos(base, variacion_total, umbral_alerta, brote_posible,
+                                       rng=np.random.default_rng(semilla))
+    return casos_pred.astype(float), alerta
+
+
+def _inicializar_trabajador(Y, años, grupos):
+    global _Y, _años, _grupos
+    _Y, _años, _grupos = Y, años, grupos
+
+
+def _evaluar_origen(origen, metodos, horizonte, semilla, multiplicador_alerta):
+    """
+    Entrena con los años <= origen, pronostica los siguientes con cada método
+    y devuelve las celdas (predicho frente a real) y el tiempo de cada método.
+    """
+    entrenamiento = _años <= origen
+    objetivo = (_años > origen) & (_años <= origen + horizonte)
+    Y_entrenamiento, Y_real = _Y[:, entrenamiento], _Y[:, objetivo]
+    años_entrenamiento, años_objetivo = _años[entrenamiento], _años[objetivo]
+
+    # Promedio, desviación y umbral de alerta con la información disponible en el origen
+    with np.errstate(all='ignore'):
+        prom_hist = np.nanmean(Y_entrenamiento, axis=1)
+        std_hist = np.nanstd(Y_entrenamiento, axis=1, ddof=1)
+    promedios = _grupos.assign(PromHist=prom_hist, StdHist=std_hist)
+    umbral_alerta = prom_hist + multiplicador_alerta * std_hist
+    alerta_real = Y_real > umbral_alerta[:, np.newaxis]
+
+    celdas, tiempos = [], {}
+    for metodo in metodos:
+        inicio = time.perf_counter()
+        if metodo == METODO_FACTORES:
+            casos_pred, alerta_pred = _pronostico_factores(promedios, años_objetivo, semilla,
+                                                            multiplicador_alerta)
+        else:
+            casos_pred = np.round(np.maximum(np.nan_to_num(
+                METODOS[metodo](Y_entrenamiento, años_entrenamiento, años_objetivo)
+            ), 0))
+            alerta_pred = casos_pred > umbral_alerta[:, np.newaxis]
+        tiempos[metodo] = time.perf_counter() - inicio
+
+        n_grupos, n_años = casos_pred.shape
+        celdas.append(pd.DataFrame({
+            'Metodo': metodo,
+            'Origen': origen,
+            'Horizonte': np.tile(años_objetivo - origen, n_grupos),
+            'Departamento': np.repeat(_grupos['Departamento'].to_numpy(), n_años),
+            'Sexo': np.repeat(_grupos['Sexo'].to_numpy(), n_años),
+            'Anio': np.tile(años_objetivo, n_grupos),
+            'PromHist': np.repeat(prom_hist, n_años),
+            'StdHist': np.repeat(std_hist, n_años),
+            'Real': Y_real.ravel(),
+            'Predicho': casos_pred.ravel(),
+            'AlertaReal': alerta_real.ravel(),
+            'AlertaPredicha': alerta_pred.ravel()
+        }))
+
+    return pd.concat(celdas, ignore_index=True), tiempos
+
+
+def ejecutar_backtesting(historico='DATASET_VIH.csv', metodos=None, horizonte=HORIZONTE,
+                         min_años=MIN_AÑOS_ENTRENAMIENTO, semilla=42, procesos=None,
+                         multiplicador_alerta=MULTIPLICADOR_ALERTA):
+    """
+    Evalúa cada método con orígenes móviles sobre el histórico.
+
+    Para cada año t desde el primer año + min_años - 1 hasta el penúltimo, se
+    entrena con los años <= t y se pronostican t+1 ... t+horizonte. Los orígenes
+    se reparten en un pool de procesos (con procesos=1 se evalúan aquí mismo).
+    Devuelve las celdas evaluadas, con el promedio y la desviación de
+    entrenamiento de cada una, y el tiempo de cada método en cada origen.
+    """
+    metodos = metodos or [METODO_FACTORES] + list(METODOS)
+    desconocidos = set(metodos) - set(METODOS) - {METODO_FACTORES}
+    if desconocidos:
+        raise ValueError(f"Métodos desconocidos: {sorted(desconocidos)}")
+    _validar_horizonte(metodos, horizonte)
+
+    if isinstance(historico, pd.DataFrame):
+        df_hist = aplicar_esquema_historico(historico)
+    else:
+        df_hist = leer_tabla(historico, esquema=aplicar_esquema_historico)
+    promedios = calcular_promedios(df_hist)
+    Y, años = matriz_series(df_hist, promedios)
+    grupos = promedios[['Departamento', 'Sexo']].astype(str).reset_index(drop=True)
+
+    origenes = [int(t) for t in años[min_años - 1:-1]]
+    if not origenes:
+        raise ValueError(f"Se necesitan más de {min_años} años de histórico para el backtesting")
+
+    procesos = min(procesos or os.cpu_count() or 1, len(origenes))
+    argumentos = (
+        origenes, itertools.repeat(metodos), itertools.repeat(horizonte),
+        itertools.repeat(semilla), itertools.repeat(multiplicador_alerta)
+    )
+    if procesos == 1:
+        # Sin pool: útil dentro de otras aplicaciones (p. ej. el dashboard)
+        _inicializar_trabajador(Y, años, grupos)
+        resultados = list(map(_evaluar_origen, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                 initargs=(Y, años, grupos)) as pool:
+            resultados = list(pool.map(_evaluar_origen, *argumentos))
+
+    celdas = pd.concat([c for c, _ in resultados], ignore_index=True)
+    celdas = celdas[celdas['Real'].notna()].reset_index(drop=True)
+    tiempos = pd.DataFrame([
+        {'Metodo': metodo, 'Origen': origen, 'Segundos': segundos}
+        for origen, (_, tiempos_origen) in zip(origenes, resultados)
+        for metodo, segundos in tiempos_origen.items()
+    ])
+    return celdas, tiempos
+
+
+def _metricas(celdas):
+    """Errores y precisión / exhaustividad de alertas de un conjunto de celdas"""
+    error = celdas['Predicho'] - celdas['Real']
+    positivos = celdas['Real'] > 0
+    verdaderos = (celdas['AlertaPredicha'] & celdas['AlertaReal']).sum()
+    predichas, reales = celdas['AlertaPredicha'].sum(), celdas['AlertaReal'].sum()
+    return pd.Series({
+        'Celdas': len(celdas),
+        'MAE': error.abs().mean(),
+        'RMSE': np.sqrt((error ** 2).mean()),
+        'MAPE': (error[positivos].abs() / celdas.loc[positivos, 'Real']).mean() * 100,
+        'Sesgo': error.mean(),
+        'Precision': verdaderos / predichas if predichas else np.nan,
+        'Exhaustividad': verdaderos / reales if reales else np.nan
+    })
+
+
+def resumir(celdas, tiempos):
+    """Métricas por método (con su tiempo total) y por método, departamento y sexo"""
+    por_metodo = celdas.groupby('Metodo', sort=False).apply(_metricas)
+    por_metodo['Segundos'] = tiempos.groupby('Metodo')['Segundos'].sum()
+    por_grupo = celdas.groupby(['Metodo', 'Departamento', 'Sexo'], sort=False).apply(_metricas)
+    for tabla in (por_metodo, por_grupo):
+        tabla['Celdas'] = tabla['Celdas'].astype(int)
+    return por_metodo.reset_index(), por_grupo.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtesting con orígenes móviles de los métodos de predicción")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV de datos históricos")
+    parser.add_argument('--metodos', nargs='+', choices=[METODO_FACTORES] + list(METODOS), default=None,
+                        help="Métodos a evaluar (por defecto, todos)")
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE, help="Años pronosticados por origen")
+    parser.add_argument('--min-años', type=int, default=MIN_AÑOS_ENTRENAMIENTO,
+                        help="Años de entrenamiento del primer origen")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador por factores")
+    parser.add_argument('--procesos', type=int, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument('--salida', default='backtesting', help="Directorio de resultados")
+    args = parser.parse_args()
+    try:
+        _validar_horizonte(args.metodos or [METODO_FACTORES], args.horizonte)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("🔁 Ejecutando backtesting con orígenes móviles...")
+    inicio = time.perf_counter()
+    celdas, tiempos = ejecutar_backtesting(args.historico, args.metodos, args.horizonte, args.min_años,
+                                           args.semilla, args.procesos)
+    por_metodo, por_grupo = resumir(celdas, tiempos)
+
+    os.makedirs(args.salida, exist_ok=True)
+    por_metodo.to_csv(os.path.join(args.salida, 'resumen_metodos.csv'), index=False)
+    por_grupo.to_csv(os.path.join(args.salida, 'errores_por_grupo.csv'), index=False)
+
+    print(f"✅ {tiempos['Origen'].nunique()} orígenes evaluados en {time.perf_counter() - inicio:.2f} s")
+    print(por_metodo.round(3).to_string(index=False))
+    print(f"📁 Resultados en {args.salida}/")
+
+
+if __name__ == "__main__":
+    main()
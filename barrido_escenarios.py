@@ -0,0 +1,151 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import (
+    AÑOS_PRED, FACTORES_AÑO, FACTORES_DEPT, FACTORES_SEXO, MULTIPLICADOR_ALERTA,
+    armar_predicciones, calcular_promedios, preparar_simulacion, simular_casos
+)
+
+# Promedios históricos compartidos por cada proceso del pool
+_promedios = None
+
+
+def cargar_grilla(ruta):
+    """
+    Lee la grilla de escenarios desde un JSON con la forma:
+
+        {
+          "factores_año": {"nombre": {"2025": {"base": ..., "variacion": ...}, ...}},
+          "factores_dept": {"nombre": {"Lima": {"tendencia": ..., "volatilidad": ...}}},
+          "factores_sexo": {"nombre": {"Masculino": {"base": ..., "variacion": ...}}},
+          "multiplicadores_alerta": [1.0, 1.5, 2.0]
+        }
+
+    Las claves ausentes usan las tablas del generador como escenario "base".
+    """
+    with open(ruta, encoding='utf-8') as f:
+        grilla = json.load(f)
+
+    # JSON solo admite claves de texto; los años se vuelven a enteros
+    if 'factores_año' in grilla:
+        grilla['factores_año'] = {
+            nombre: {int(año): factores for año, factores in tabla.items()}
+            for nombre, tabla in grilla['factores_año'].items()
+        }
+    return grilla
+
+
+def expandir_escenarios(grilla):
+    """Producto cartesiano de las tablas de factores y multiplicadores de la grilla"""
+    tablas_año = grilla.get('factores_año') or {'base': FACTORES_AÑO}
+    tablas_dept = grilla.get('factores_dept') or {'base': FACTORES_DEPT}
+    tablas_sexo = grilla.get('factores_sexo') or {'base': FACTORES_SEXO}
+    multiplicadores = grilla.get('multiplicadores_alerta') or [MULTIPLICADOR_ALERTA]
+
+    # Cada tabla de años debe cubrir todos los años simulados
+    for nombre, tabla in tablas_año.items():
+        faltantes = [año for año in AÑOS_PRED if año not in tabla]
+        if faltantes:
+            raise ValueError(f"La tabla de factores_año '{nombre}' no tiene los años {faltantes}")
+
+    escenarios = []
+    combinaciones = itertools.product(tablas_año.items(), tablas_dept.items(), tablas_sexo.items(), multiplicadores)
+    for i, ((n_año, f_año), (n_dept, f_dept), (n_sexo, f_sexo), k) in enumerate(combinaciones):
+        escenarios.append({
+            'id': f"escenario_{i:04d}",
+            'factores_año': n_año,
+            'factores_dept': n_dept,
+            'factores_sexo': n_sexo,
+            'multiplicador_alerta': k,
+            'tablas': (f_año, f_dept, f_sexo)
+        })
+    return escenarios
+
+
+def _inicializar_trabajador(promedios):
+    global _promedios
+    _promedios = promedios
+
+
+def _ejecutar_escenario(escenario, semilla, dir_salida):
+    """Simula un escenario, guarda su resultado comprimido y devuelve su fila de resumen"""
+    factores_año, factores_dept, factores_sexo = escenario['tablas']
+
+    # Misma semilla en todos los escenarios: las diferencias se deben solo a los factores
+    rng = np.random.default_rng(semilla)
+    base, variacion_total, umbral_alerta, brote_posible = preparar_simulacion(
+        _promedios, AÑOS_PRED, factores_año, factores_dept, factores_sexo,
+        escenario['multiplicador_alerta']
+    )
+    casos_pred, alerta = simular_casos(base, variacion_total, umbral_alerta, brote_posible, rng=rng)
+    df_escenario = armar_predicciones(_promedios, AÑOS_PRED, casos_pred, alerta)
+
+    archivo = os.path.join(dir_salida, f"{escenario['id']}.csv.gz")
+    df_escenario.to_csv(archivo, index=False, compression='gzip')
+
+    resumen = {clave: valor for clave, valor in escenario.items() if clave != 'tablas'}
+    resumen['Alertas'] = int(alerta.sum())
+    resumen['CasosTotales'] = int(casos_pred.sum())
+    for año, alertas_año in zip(AÑOS_PRED, alerta.sum(axis=0)):
+        resumen[f'Alertas_{año}'] = int(alertas_año)
+    resumen['Archivo'] = archivo
+    return resumen
+
+
+def barrer_escenarios(grilla, ruta_historico='DATASET_VIH.csv', dir_salida='escenarios',
+                      semilla=42, procesos=None):
+    """
+    Ejecuta todos los escenarios de la grilla en un pool de procesos.
+
+    Cada escenario escribe su propio CSV comprimido en dir_salida y el resumen
+    de alertas de todos ellos se guarda en dir_salida/resumen_escenarios.csv.
+    """
+    os.makedirs(dir_salida, exist_ok=True)
+    promedios = calcular_promedios(leer_tabla(ruta_historico, esquema=aplicar_esquema_historico))
+    escenarios = expandir_escenarios(grilla)
+
+    procesos = procesos or os.cpu_count() or 1
+    tamaño_tanda = max(1, len(escenarios) // (procesos * 4))
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(promedios,)) as pool:
+        resultados = list(pool.map(
+            _ejecutar_escenario, escenarios,
+            itertools.repeat(semilla), itertools.repeat(dir_salida),
+            chunksize=tamaño_tanda
+        ))
+
+    df_resumen = pd.DataFrame(resultados)
+    df_resumen.to_csv(os.path.join(dir_salida, 'resumen_escenarios.csv'), index=False)
+    return df_resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de escenarios epidemiológicos de VIH")
+    parser.add_argument('--grilla', help="JSON con las tablas de factores y multiplicadores")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV de datos históricos")
+    parser.add_argument('--salida', default='escenarios', help="Directorio de resultados")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument('--procesos', type=int, help="Procesos del pool (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+
+    grilla = cargar_grilla(args.grilla) if args.grilla else {}
+
+    print(f"🧪 Ejecutando {len(expandir_escenarios(grilla))} escenarios...")
+    df_resumen = barrer_escenarios(grilla, args.historico, args.salida, args.semilla, args.procesos)
+
+    print(f"✅ Escenarios completados. Resumen en {os.path.join(args.salida, 'resumen_escenarios.csv')}")
+    print(df_resumen[['id', 'factores_año', 'factores_dept', 'factores_sexo',
+                      'multiplicador_alerta', 'Alertas']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
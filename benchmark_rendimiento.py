@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import guardar_tabla, leer_tabla, ruta_columnar
+from esquema import aplicar_esquema_historico
+from generar_datos_sinteticos import escribir_datos, generar_lotes
+from generar_predicciones_variables import generar_predicciones
+from graficos import construir_grafico, construir_grafico_anual, datos_grafico
+from indice_datos import construir_indice, obtener_año, obtener_grupo
+from servicio_consultas import cargar_datos
+
+# Escalas del historial (parámetros de generar_datos_sinteticos.generar_lotes).
+# 'actual' reproduce el tamaño de DATASET_VIH.csv (25 departamentos × 2 sexos × 10 años).
+ESCALAS = {
+    'actual': {'distritos': 1, 'mensual': False, 'por_edad': False},
+    'provincia': {'distritos': 8, 'mensual': False, 'por_edad': False},
+    'distrito_mes': {'distritos': 75, 'mensual': True, 'por_edad': False},
+    'distrito_mes_edad': {'distritos': 75, 'mensual': True, 'por_edad': True}
+}
+
+# Consultas aleatorias por medición de filtrado
+CONSULTAS = 200
+
+TIPOS_GRAFICO = ["Barras", "Líneas", "Área"]
+
+# Columnas del historial sintético que definen el grano más fino de cada escala
+COLUMNAS_GRANO = ['Distrito', 'GrupoEdad']
+
+
+def grano_completo(df_hist):
+    """
+    Historial con una serie por unidad del grano completo (distrito y grupo de edad).
+
+    Los dashboards agrupan por (Departamento, Sexo); aquí la columna Departamento
+    pasa a identificar la unidad más fina de la escala (p. ej. 'Lima D003 25-34'),
+    así que las predicciones, el índice y los gráficos crecen con la escala en
+    lugar de quedarse en los ~50 grupos departamentales.
+    """
+    columnas = [c for c in COLUMNAS_GRANO if c in df_hist.columns]
+    if not columnas:
+        return df_hist
+    unidad = df_hist[columnas[0]].astype(str)
+    for columna in columnas[1:]:
+        unidad = unidad + ' ' + df_hist[columna].astype(str)
+    return aplicar_esquema_historico(df_hist.assign(Departamento=unidad))
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta funcion varias veces y devuelve la mediana y el mínimo en segundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {'mediana_s': statistics.median(tiempos), 'min_s': min(tiempos), 'repeticiones': repeticiones}
+
+
+def medir_escala(nombre, parametros, repeticiones=5, semilla=0):
+    """Mide las rutas de carga, filtrado, generación y gráficos para una escala"""
+    resultados = []
+
+    def registrar(operacion, medicion, **extra):
+        resultados.append({'escala': nombre, 'operacion': operacion, **medicion, **extra})
+        print(f"  {operacion:<22} {medicion['mediana_s'] * 1000:>10.3f} ms")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_hist = os.path.join(carpeta, 'historico.csv')
+        ruta_pred = os.path.join(carpeta, 'predicciones.csv')
+        escribir_datos(
+            (grano_completo(lote) for lote in generar_lotes(**parametros, semilla=semilla)), ruta_hist
+        )
+        df_hist = leer_tabla(ruta_hist, esquema=aplicar_esquema_historico)
+        registrar('generar_predicciones', medir(lambda: generar_predicciones(df_hist), repeticiones),
+                  grupos=df_hist.groupby(['Departamento', 'Sexo'], observed=True).ngroups)
+        guardar_tabla(generar_predicciones(df_hist), ruta_pred)
+
+        # load_data en frío (conversión del CSV) y en caliente (copia columnar ya creada)
+        def carga_fria():
+            for ruta in (ruta_hist, ruta_pred):
+                if os.path.exists(ruta_columnar(ruta)):
+                    os.remove(ruta_columnar(ruta))
+            return cargar_datos(ruta_pred, ruta_hist)
+        registrar('load_data_frio', medir(carga_fria, max(1, repeticiones // 2)))
+        registrar('load_data', medir(lambda: cargar_datos(ruta_pred, ruta_hist), repeticiones))
+
+        df_pred, df_hist = cargar_datos(ruta_pred, ruta_hist)
+        registrar('construir_indice', medir(lambda: construir_indice(df_pred, df_hist), repeticiones),
+                  filas=len(df_hist) + len(df_pred))
+        indice = construir_indice(df_pred, df_hist)
+
+        # Consultas sobre combinaciones aleatorias (tiempo por consulta)
+        rng = np.random.default_rng(semilla)
+        grupos = list(indice['pred']['grupos'])
+        años = sorted(df_pred['Anio'].unique().tolist())
+        consultas = [(*grupos[i], años[j]) for i, j in zip(
+            rng.integers(len(grupos), size=CONSULTAS), rng.integers(len(años), size=CONSULTAS)
+        )]
+
+        def filtrar():
+            for dept, sexo, _ in consultas:
+                obtener_grupo(indice, 'hist', dept, sexo)
+                obtener_grupo(indice, 'pred', dept, sexo)
+
+        def año_seleccionado():
+            for dept, sexo, año in consultas:
+                obtener_año(indice, 'pred', año, dept, sexo)
+
+        for operacion, funcion in [('get_filtered_data', filtrar), ('get_year_data', año_seleccionado)]:
+            medicion = medir(funcion, repeticiones)
+            medicion = {k: v / CONSULTAS if k.endswith('_s') else v for k, v in medicion.items()}
+            registrar(operacion, medicion)
+
+        # Construcción de gráficos (especificación Vega-Lite completa)
+        dept, sexo, año = consultas[0]
+        fila = obtener_año(indice, 'pred', año, dept, sexo).iloc[0]
+        for tipo in TIPOS_GRAFICO:
+            def grafico():
+                df_completo = datos_grafico(obtener_grupo(indice, 'hist', dept, sexo),
+                                            obtener_grupo(indice, 'pred', dept, sexo))
+                return construir_grafico(tipo, df_completo, año, dept, sexo,
+                                         float(fila['PromHist']), int(fila['CasosEstimados_Predichos'])).to_dict()
+            medir_grafico(registrar, resultados, nombre, f'grafico_{tipo}', grafico, repeticiones)
+
+        # Ruta de gráficos de app_Version3 (solo los años predichos)
+        for tipo in TIPOS_GRAFICO:
+            def grafico_anual():
+                return construir_grafico_anual(tipo, obtener_grupo(indice, 'pred', dept, sexo), año, dept, sexo,
+                                               float(fila['PromHist'])).to_dict()
+            medir_grafico(registrar, resultados, nombre, f'grafico_v3_{tipo}', grafico_anual, repeticiones)
+
+    return resultados
+
+
+def medir_grafico(registrar, resultados, escala, operacion, funcion, repeticiones):
+    """Mide la construcción de un gráfico; si Altair lo rechaza se registra el error y se sigue"""
+    try:
+        registrar(operacion, medir(funcion, repeticiones))
+    except Exception as e:
+        # P. ej. Altair rechaza tablas de más de 5000 filas
+        resultados.append({'escala': escala, 'operacion': operacion, 'error': str(e).splitlines()[0]})
+        print(f"  {operacion:<22} ❌ {str(e).splitlines()[0]}")
+
+
+def comparar(actual, anterior):
+    """Imprime la razón de tiempos entre dos corridas guardadas en JSON"""
+    previos = {(r['escala'], r['operacion']): r.get('mediana_s') for r in anterior['resultados']}
+    print(f"\n📊 Comparación con la corrida del {anterior['fecha']} (anterior / actual):")
+    for r in actual['resultados']:
+        previo = previos.get((r['escala'], r['operacion']))
+        if previo and r.get('mediana_s'):
+            print(f"  {r['escala']:<18} {r['operacion']:<22} {previo / r['mediana_s']:>7.2f}×")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga, filtrado, generación y gráficos")
+    parser.add_argument('--escalas', nargs='+', choices=list(ESCALAS), default=['actual', 'provincia'],
+                        help="Escalas sintéticas a medir")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default=None, help="Archivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    corrida = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'plataforma': platform.platform(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'repeticiones': args.repeticiones,
+        'escalas': {nombre: ESCALAS[nombre] for nombre in args.escalas},
+        'resultados': []
+    }
+    for nombre in args.escalas:
+        print(f"⏱️ Escala {nombre}: {ESCALAS[nombre]}")
+        corrida['resultados'] += medir_escala(nombre, ESCALAS[nombre], args.repeticiones, args.semilla)
+
+    salida = args.salida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(corrida, f, ensure_ascii=False, indent=1)
+    print(f"💾 Resultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(corrida, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from cache_lru import CacheLRU
+
+
+class CacheGraficos(CacheLRU):
+    """
+    Caché LRU acotada de especificaciones Vega-Lite ya construidas.
+
+    Las claves incluyen la versión de los datos, así que las especificaciones de
+    versiones anteriores nunca se sirven y salen de la caché a medida que se
+    usan combinaciones nuevas. construir() debe devolver un dict Vega-Lite.
+    """
+
+    def __init__(self, capacidad=256):
+        super().__init__(capacidad)
@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Caché LRU acotada y segura entre hilos.
+
+    Cuando se supera la capacidad sale la entrada usada hace más tiempo. Si las
+    claves incluyen la versión de los datos, los valores de versiones
+    anteriores nunca se sirven y van saliendo a medida que se usan claves nuevas.
+    """
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._valores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir):
+        """Devuelve el valor guardado para la clave o lo construye con construir() y lo guarda"""
+        with self._lock:
+            valor = self._valores.get(clave)
+            if valor is not None:
+                self._valores.move_to_end(clave)
+                self.aciertos += 1
+                return valor
+
+        # La construcción se hace fuera del candado para no bloquear otras sesiones
+        valor = construir()
+
+        with self._lock:
+            self.fallos += 1
+            self._valores[clave] = valor
+            self._valores.move_to_end(clave)
+            while len(self._valores) > self.capacidad:
+                self._valores.popitem(last=False)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._valores.clear()
+
+    def __len__(self):
+        return len(self._valores)
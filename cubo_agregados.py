@@ -0,0 +1,68 @@
+import pandas as pd
+
+# Valor de Departamento / Sexo en las filas que agregan todos los departamentos o sexos
+TOTAL = 'Total'
+
+# Columnas del cubo además de las claves (Anio, Departamento, Sexo)
+COLUMNAS_CUBO = ['Casos', 'Alertas', 'CasosAnterior', 'Delta', 'DeltaPct', 'Min', 'Max', 'Media']
+
+
+def construir_cubo(df_pred):
+    """
+    Precalcula los agregados de predicción por año × departamento × sexo.
+
+    Además de cada combinación incluye los totales por departamento (Sexo =
+    'Total'), por sexo a nivel nacional (Departamento = 'Total') y el total
+    nacional. Cada fila trae los casos y alertas del año, los casos del año
+    anterior con su diferencia absoluta y porcentual, y el mínimo, máximo y
+    promedio de todos los años de esa combinación. Se construye una sola vez por
+    versión de los datos; las consultas son búsquedas en el índice del cubo.
+    """
+    base = pd.DataFrame({
+        'Anio': df_pred['Anio'].astype(int).to_numpy(),
+        'Departamento': df_pred['Departamento'].astype(str).to_numpy(),
+        'Sexo': df_pred['Sexo'].astype(str).to_numpy(),
+        'Casos': df_pred['CasosEstimados_Predichos'].astype('int64').to_numpy(),
+        'Alertas': df_pred['Alerta'].astype('int64').to_numpy()
+    })
+
+    # Combinaciones y sus agregaciones (roll-ups)
+    niveles = [
+        base,
+        base.assign(Sexo=TOTAL),
+        base.assign(Departamento=TOTAL),
+        base.assign(Departamento=TOTAL, Sexo=TOTAL)
+    ]
+    cubo = (
+        pd.concat(niveles, ignore_index=True)
+        .groupby(['Departamento', 'Sexo', 'Anio'], sort=True)[['Casos', 'Alertas']].sum()
+        .reset_index()
+    )
+
+    # Rezago y diferencias frente al año anterior dentro de cada combinación
+    grupos = cubo.groupby(['Departamento', 'Sexo'], sort=False)['Casos']
+    anterior = grupos.shift(1)
+    consecutivo = cubo['Anio'] - cubo.groupby(['Departamento', 'Sexo'], sort=False)['Anio'].shift(1) == 1
+    cubo['CasosAnterior'] = anterior.where(consecutivo)
+    cubo['Delta'] = cubo['Casos'] - cubo['CasosAnterior']
+    cubo['DeltaPct'] = (cubo['Delta'] / cubo['CasosAnterior'] * 100).where(cubo['CasosAnterior'] > 0)
+
+    # Estadísticas de todos los años de la combinación
+    cubo['Min'] = grupos.transform('min')
+    cubo['Max'] = grupos.transform('max')
+    cubo['Media'] = grupos.transform('mean')
+
+    return cubo.set_index(['Anio', 'Departamento', 'Sexo']).sort_index()
+
+
+def obtener_celda(cubo, año, departamento=TOTAL, sexo=TOTAL):
+    """Fila del cubo como diccionario, o None si la combinación no existe"""
+    try:
+        return cubo.loc[(int(año), departamento, sexo)].to_dict()
+    except KeyError:
+        return None
+
+
+def totales_por_año(cubo, departamento=TOTAL, sexo=TOTAL):
+    """Serie de casos, alertas y diferencias por año para una combinación (por defecto, nacional)"""
+    return cubo.xs((departamento, sexo), level=['Departamento', 'Sexo'])
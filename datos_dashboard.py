@@ -0,0 +1,289 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from almacenamiento import leer_tabla
+from cubo_agregados import construir_cubo
+from descarga_remota import DescargaRemota
+from esquema import aplicar_esquema_historico, aplicar_esquema_predicciones
+from generar_predicciones_variables import generar_predicciones
+from indice_datos import construir_indice
+from jerarquia import etiqueta_nodo, pronosticar_jerarquico, totales_jerarquicos
+from niveles_riesgo import calcular_niveles
+from refresco_datos import RefrescoDatos
+from sensibilidad_umbral import analizar_umbrales
+
+RUTA_HISTORICO = 'DATASET_VIH.csv'
+RUTA_PREDICCIONES = 'predicciones_alerta_vih_2025_2030.csv'
+RUTA_CORREGIDO = 'predicciones_alerta_vih_2025_2030_simulado_corregido.csv'
+
+# Dataset simulado mejorado que usan app_Version3 y app_Version3_FIXED
+URL_DATOS = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/predicciones_alerta_vih_2025_2030_simulado-sJhB4luINPdUPcTCLKSgmVsfrVb0ui.csv"
+
+# Fuente de datos de cada dashboard:
+#   local:       CSV locales (app.py)
+#   remota:      dataset remoto con el histórico local y respaldos locales (app_Version3.py)
+#   remota_fija: solo el dataset remoto, sin histórico (app_Version3_FIXED.py)
+FUENTES = ['local', 'remota', 'remota_fija']
+
+# Las páginas usan la fuente del dashboard abierto en la sesión; si se entra
+# directamente a una página, la de la aplicación principal (app_Version3.py)
+FUENTE_DEFECTO = 'remota'
+CLAVE_FUENTE = 'fuente_datos'
+
+
+def generar_datos_ejemplo():
+    """Genera datos de ejemplo con variaciones por año"""
+
+    departamentos = ['Amazonas', 'Ancash', 'Apurimac', 'Arequipa', 'Ayacucho', 'Cajamarca',
+                    'Callao', 'Cusco', 'Huancavelica', 'Huanuco', 'Ica', 'Junin',
+                    'La Libertad', 'Lambayeque', 'Lima', 'Loreto', 'Madre de Dios',
+                    'Moquegua', 'Pasco', 'Piura', 'Puno', 'San Martin', 'Tacna', 'Tumbes', 'Ucayali']
+
+    sexos = ['Masculino', 'Femenino']
+    años_pred = [2025, 2026, 2027, 2028, 2029, 2030]
+
+    # Valores base por departamento (aproximados)
+    valores_base = {
+        'Lima': {'Masculino': 3500, 'Femenino': 900},
+        'Callao': {'Masculino': 480, 'Femenino': 120},
+        'Loreto': {'Masculino': 550, 'Femenino': 140},
+        'Arequipa': {'Masculino': 320, 'Femenino': 80},
+        'La Libertad': {'Masculino': 350, 'Femenino': 90},
+        'Ica': {'Masculino': 280, 'Femenino': 70},
+        'Lambayeque': {'Masculino': 220, 'Femenino': 55},
+        'Junin': {'Masculino': 190, 'Femenino': 48},
+        'Ucayali': {'Masculino': 190, 'Femenino': 48},
+        'Ancash': {'Masculino': 160, 'Femenino': 42},
+        'Piura': {'Masculino': 160, 'Femenino': 42},
+        'Amazonas': {'Masculino': 135, 'Femenino': 35},
+        'Cusco': {'Masculino': 125, 'Femenino': 32},
+        'San Martin': {'Masculino': 125, 'Femenino': 32},
+        'Huanuco': {'Masculino': 110, 'Femenino': 28},
+        'Cajamarca': {'Masculino': 95, 'Femenino': 24},
+        'Madre de Dios': {'Masculino': 95, 'Femenino': 24},
+        'Puno': {'Masculino': 95, 'Femenino': 24},
+        'Ayacucho': {'Masculino': 80, 'Femenino': 20},
+        'Tacna': {'Masculino': 80, 'Femenino': 20},
+        'Apurimac': {'Masculino': 65, 'Femenino': 17},
+        'Moquegua': {'Masculino': 65, 'Femenino': 17},
+        'Tumbes': {'Masculino': 65, 'Femenino': 17},
+        'Huancavelica': {'Masculino': 50, 'Femenino': 13},
+        'Pasco': {'Masculino': 50, 'Femenino': 13}
+    }
+
+    # Factores de variación por año
+    factores_año = {
+        2025: 1.02,  # +2%
+        2026: 0.98,  # -2%
+        2027: 1.05,  # +5%
+        2028: 1.08,  # +8%
+        2029: 0.95,  # -5%
+        2030: 1.03   # +3%
+    }
+
+    predicciones = []
+    # Generador propio (misma secuencia que np.random.seed(42)): se llama desde el
+    # hilo de refresco y no debe tocar el estado global de np.random
+    rng = np.random.RandomState(42)
+
+    for dept in departamentos:
+        for sexo in sexos:
+            base_value = valores_base.get(dept, {'Masculino': 100, 'Femenino': 25})[sexo]
+            prom_hist = base_value * 0.95  # Promedio histórico ligeramente menor
+
+            for año in años_pred:
+                # Aplicar factor del año + variación aleatoria
+                factor = factores_año[año]
+                variacion = rng.normal(0, 0.1)  # ±10% de variación
+
+                casos_pred = int(base_value * factor * (1 + variacion))
+                casos_pred = max(1, casos_pred)  # Mínimo 1 caso
+
+                # Generar alerta si supera el promedio + 20%
+                alerta = casos_pred > (prom_hist * 1.2)
+
+                predicciones.append({
+                    'Anio': año,
+                    'Departamento': dept,
+                    'Sexo': sexo,
+                    'CasosEstimados_Predichos': casos_pred,
+                    'PromHist': round(prom_hist, 1),
+                    'Alerta': alerta
+                })
+
+    return aplicar_esquema_predicciones(pd.DataFrame(predicciones))
+
+
+# --- Cargas de cada fuente ---
+# Se ejecutan fuera de las sesiones (en el hilo de refresco de datos), así que
+# devuelven también los avisos para la interfaz: (df_pred, df_hist, avisos).
+
+def cargar_local():
+    """CSV locales; sin archivo de predicciones se generan en memoria a partir del histórico"""
+    df_hist = leer_tabla(RUTA_HISTORICO, esquema=aplicar_esquema_historico)
+    try:
+        df_pred = leer_tabla(RUTA_PREDICCIONES, esquema=aplicar_esquema_predicciones)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        # Sin archivo de predicciones: generarlas en memoria a partir del histórico
+        df_pred = generar_predicciones(df_hist)
+    return df_pred, df_hist, []
+
+
+def _cargar_remota_con_respaldos(descarga):
+    avisos = []
+    try:
+        # Intentar cargar desde URL primero (o su copia local)
+        try:
+            # Corregir tipos de datos (esquema compacto compartido)
+            df_pred = leer_tabla(descarga.obtener(), esquema=aplicar_esquema_predicciones)
+
+            avisos.append(('success', "✅ Datos cargados desde el dataset simulado mejorado"))
+
+        except:
+            df_pred = None
+
+        # Intentar cargar datos históricos
+        try:
+            df_hist = leer_tabla(RUTA_HISTORICO, esquema=aplicar_esquema_historico)
+        except:
+            df_hist = pd.DataFrame()  # Datos históricos vacíos si no existen
+
+        if df_pred is None:
+            try:
+                # Fallback a archivo local si existe
+                df_pred = leer_tabla(RUTA_CORREGIDO, esquema=aplicar_esquema_predicciones)
+            except FileNotFoundError:
+                if df_hist.empty:
+                    raise
+                # Generar en memoria a partir del histórico, sin escribir a disco
+                df_pred = generar_predicciones(df_hist)
+
+        return df_pred, df_hist, avisos
+
+    except Exception as e:
+        avisos.append(('error', f"Error cargando datos: {e}"))
+        return pd.DataFrame(), pd.DataFrame(), avisos
+
+
+def cargar_remota(descarga):
+    """Dataset remoto con el histórico local; si falla, archivos locales o datos de ejemplo"""
+    try:
+        df_pred, df_hist, avisos = _cargar_remota_con_respaldos(descarga)
+        if df_pred.empty:
+            avisos.append(('warning', "⚠️ Generando datos de ejemplo con variaciones por año..."))
+            df_pred = generar_datos_ejemplo()
+            # Guardar para uso futuro
+            df_pred.to_csv(RUTA_PREDICCIONES, index=False)
+            avisos.append(('success', "✅ Datos de ejemplo generados con variaciones por año"))
+    except:
+        avisos = [('warning', "⚠️ Generando datos de ejemplo...")]
+        df_pred = generar_datos_ejemplo()
+        df_hist = pd.DataFrame()  # Datos históricos vacíos para el ejemplo
+    return df_pred, df_hist, avisos
+
+
+def cargar_remota_fija(descarga):
+    """Solo el dataset remoto (sin histórico); si falla, datos de ejemplo"""
+    avisos = []
+    try:
+        # Cargar desde la copia local (solo espera a la red si aún no existe).
+        # Limpiar datos nulos y aplicar el esquema compacto compartido
+        df_pred = leer_tabla(descarga.obtener(), esquema=lambda df: aplicar_esquema_predicciones(df.dropna()))
+
+        avisos.append(('success', "✅ Datos cargados exitosamente desde el dataset simulado"))
+
+    except Exception as e:
+        avisos.append(('error', f"❌ Error cargando datos desde URL: {e}"))
+
+        # Generar datos de ejemplo como fallback
+        avisos.append(('warning', "⚠️ Generando datos de ejemplo..."))
+        df_pred = generar_datos_ejemplo()
+
+    # Datos históricos vacíos (opcional)
+    return df_pred, pd.DataFrame(), avisos
+
+
+def _sensibilidad(df_pred, df_hist):
+    """Grilla de sensibilidad del umbral; necesita un histórico con años suficientes para el backtesting"""
+    if df_hist.empty:
+        return None
+    try:
+        return analizar_umbrales(df_pred, df_hist)
+    except ValueError:
+        return None
+
+
+def _totales_por_nivel(df_pred, df_hist):
+    """Totales de las predicciones en todos los niveles, con el pronóstico reconciliado si hay histórico"""
+    totales = totales_jerarquicos(df_pred)
+    columnas = ['Nivel', 'Macrorregion', 'Departamento', 'Sexo', 'Anio']
+    try:
+        pronostico = pronosticar_jerarquico(df_hist)[columnas + ['Reconciliado']] if not df_hist.empty else None
+    except ValueError:
+        pronostico = None
+    if pronostico is None:
+        totales['Reconciliado'] = np.nan
+    else:
+        totales = totales.merge(pronostico, on=columnas, how='left')
+    totales['Nodo'] = etiqueta_nodo(totales)
+    return totales
+
+
+def preparar_datos(datos):
+    """Derivados de cada versión de los datos que usan el dashboard y sus páginas"""
+    df_pred, df_hist, _ = datos
+    if df_pred.empty:
+        return dict.fromkeys(['indice', 'cubo', 'niveles', 'sensibilidad', 'totales_nivel'])
+    return {
+        'indice': construir_indice(df_pred, df_hist),
+        'cubo': construir_cubo(df_pred),
+        'niveles': calcular_niveles(df_pred),  # Panorama nacional
+        'sensibilidad': _sensibilidad(df_pred, df_hist),  # Sensibilidad del umbral
+        'totales_nivel': _totales_por_nivel(df_pred, df_hist)  # Totales por nivel
+    }
+
+
+# --- Datos compartidos entre sesiones y páginas ---
+
+# Copia local del dataset remoto: se sirve al instante y se revalida en segundo plano
+@st.cache_resource
+def get_descarga():
+    return DescargaRemota(URL_DATOS)
+
+
+# Un hilo de fondo por fuente detecta cambios en los archivos (y revalida la copia
+# del dataset remoto), carga y prepara la versión nueva y la reemplaza de una vez;
+# las sesiones siempre leen la versión vigente sin esperar la recarga. Si la
+# descarga remota falló y se sirven datos de respaldo, la reintenta con espera
+# creciente hasta conseguirla.
+@st.cache_resource
+def get_refresco(fuente):
+    if fuente == 'local':
+        return RefrescoDatos(cargar_local, [RUTA_PREDICCIONES, RUTA_HISTORICO], preparar_datos).iniciar()
+
+    descarga = get_descarga()
+    if fuente == 'remota':
+        cargar, rutas = (lambda: cargar_remota(descarga)), [descarga.ruta, RUTA_CORREGIDO, RUTA_HISTORICO]
+    elif fuente == 'remota_fija':
+        cargar, rutas = (lambda: cargar_remota_fija(descarga)), [descarga.ruta]
+    else:
+        raise ValueError(f"Fuente de datos desconocida: {fuente} (disponibles: {FUENTES})")
+    return RefrescoDatos(
+        cargar,
+        rutas,
+        preparar_datos,
+        al_revisar=lambda: descarga.tiene_copia() and descarga.obtener(),
+        es_respaldo=lambda datos: not descarga.tiene_copia()
+    ).iniciar()
+
+
+def usar_fuente(fuente):
+    """Instantánea vigente de la fuente de un dashboard, que también usarán sus páginas en esta sesión"""
+    st.session_state[CLAVE_FUENTE] = fuente
+    return get_refresco(fuente).actual()
+
+
+def instantanea_sesion():
+    """Instantánea vigente de la fuente del dashboard de la sesión (para las páginas)"""
+    return get_refresco(st.session_state.get(CLAVE_FUENTE, FUENTE_DEFECTO)).actual()
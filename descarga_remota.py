@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+# Carpeta donde se guardan las copias locales de los datos remotos
+CARPETA_CACHE = '.cache_descargas'
+
+# Segundos de espera máximos por petición
+TIEMPO_ESPERA = 10
+
+# Segundos durante los que una copia se considera vigente sin revalidarla
+EDAD_MAXIMA = 300
+
+
+class DescargaRemota:
+    """
+    Copia local de un archivo remoto con revalidación HTTP.
+
+    La primera vez se descarga (con tiempo de espera) y se guarda en disco junto
+    con su ETag y Last-Modified. Después se sirve siempre la copia local al
+    instante; cuando tiene más de edad_maxima segundos se revalida en un hilo de
+    fondo con If-None-Match / If-Modified-Since, de modo que un servidor lento o
+    caído nunca bloquea la carga si ya existe una copia.
+    """
+
+    def __init__(self, url, carpeta=CARPETA_CACHE, tiempo_espera=TIEMPO_ESPERA,
+                 edad_maxima=EDAD_MAXIMA, extension='.csv'):
+        self.url = url
+        self.tiempo_espera = tiempo_espera
+        self.edad_maxima = edad_maxima
+        self.ultimo_error = None
+
+        nombre = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+        self.ruta = os.path.join(carpeta, nombre + extension)
+        self._ruta_meta = self.ruta + '.json'
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def obtener(self, en_segundo_plano=True):
+        """
+        Ruta de la copia local. Solo espera a la red si todavía no hay copia;
+        si la copia está vencida se revalida en segundo plano (o aquí mismo con
+        en_segundo_plano=False).
+        """
+        if self.tiene_copia():
+            if self._vencida():
+                if en_segundo_plano:
+                    self.refrescar_en_segundo_plano()
+                else:
+                    self._revalidar_sin_errores()
+            return self.ruta
+
+        self.revalidar()  # Sin copia: los errores de red se propagan
+        return self.ruta
+
+    def tiene_copia(self):
+        return os.path.exists(self.ruta) and self._leer_meta() is not None
+
+    def revalidar(self):
+        """
+        Pide el recurso con cabeceras condicionales y actualiza la copia.
+        Devuelve True si llegó contenido distinto al guardado.
+        """
+        meta = self._leer_meta() or {}
+        cabeceras = {}
+        if os.path.exists(self.ruta):
+            if meta.get('etag'):
+                cabeceras['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                cabeceras['If-Modified-Since'] = meta['last_modified']
+
+        respuesta = requests.get(self.url, headers=cabeceras, timeout=self.tiempo_espera)
+        if respuesta.status_code == 304:
+            meta['revalidado'] = time.time()
+            self._guardar_meta(meta)
+            return False
+        respuesta.raise_for_status()
+
+        sha256 = hashlib.sha256(respuesta.content).hexdigest()
+        nuevo = sha256 != meta.get('sha256') or not os.path.exists(self.ruta)
+        if nuevo:
+            _escribir_atomico(self.ruta, respuesta.content)
+        self._guardar_meta({
+            'url': self.url,
+            'etag': respuesta.headers.get('ETag'),
+            'last_modified': respuesta.headers.get('Last-Modified'),
+            'sha256': sha256,
+            'revalidado': time.time()
+        })
+        return nuevo
+
+    def refrescar_en_segundo_plano(self):
+        """Lanza la revalidación en un hilo de fondo (uno a la vez) y devuelve el hilo"""
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._revalidar_sin_errores, name='descarga-remota', daemon=True
+                )
+                self._hilo.start()
+            return self._hilo
+
+    def _revalidar_sin_errores(self):
+        try:
+            self.ultimo_error = None
+            return self.revalidar()
+        except requests.RequestException as e:
+            # Se sigue sirviendo la copia anterior
+            self.ultimo_error = e
+            return False
+
+    def _vencida(self):
+        meta = self._leer_meta() or {}
+        return time.time() - meta.get('revalidado', 0) > self.edad_maxima
+
+    def _leer_meta(self):
+        try:
+            with open(self._ruta_meta, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _guardar_meta(self, meta):
+        _escribir_atomico(self._ruta_meta, json.dumps(meta, ensure_ascii=False, indent=1).encode('utf-8'))
+
+
+def _escribir_atomico(ruta, contenido):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
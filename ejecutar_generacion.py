@@ -1,30 +1,159 @@
-import subprocess
-import sys
+import argparse
+import csv
+import hashlib
+import json
 import os
 
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import (
+    AÑOS_PRED, calcular_promedios, generar_predicciones, generar_predicciones_por_grupo, mostrar_resumen
+)
+
+RUTA_HISTORICO = 'DATASET_VIH.csv'
+RUTA_PREDICCIONES = 'predicciones_alerta_vih_2025_2030.csv'
+
+
+def ruta_huellas(ruta_predicciones):
+    """Archivo donde se guardan las huellas de los grupos usados en la última generación"""
+    return os.path.splitext(ruta_predicciones)[0] + '.huellas.json'
+
+
+def huellas_historico(df_hist):
+    """
+    Huella del historial de cada (departamento, sexo).
+
+    Se combina el hash de cada fila con una suma por grupo (independiente del
+    orden de las filas) más el número de filas, todo de forma vectorizada.
+    """
+    columnas = [c for c in df_hist.columns if c not in ('Departamento', 'Sexo')]
+    hash_filas = pd.util.hash_pandas_object(df_hist[columnas], index=False)
+    por_grupo = hash_filas.groupby([df_hist['Departamento'], df_hist['Sexo']], observed=True).agg(['sum', 'count'])
+    return {
+        f"{dept}|{sexo}": f"{int(suma):016x}-{int(n)}"
+        for (dept, sexo), suma, n in zip(por_grupo.index, por_grupo['sum'], por_grupo['count'])
+    }
+
+
+def regenerar_incremental(ruta_historico=RUTA_HISTORICO, ruta_predicciones=RUTA_PREDICCIONES, semilla=42):
+    """
+    Regenera solo los grupos cuyo historial cambió desde la última generación.
+
+    Las filas de los grupos sin cambios se copian tal cual del archivo actual
+    (byte a byte) y las de los grupos nuevos o modificados se generan con una
+    semilla propia por grupo. Devuelve la lista de grupos regenerados.
+    """
+    df_hist = leer_tabla(ruta_historico, esquema=aplicar_esquema_historico)
+    promedios = calcular_promedios(df_hist)
+    claves = [f"{d}|{s}" for d, s in zip(promedios['Departamento'], promedios['Sexo'])]
+    huellas = huellas_historico(df_hist)
+
+    # Huellas de la generación anterior, válidas solo si fue con la misma
+    # configuración y el archivo de predicciones no se reescribió después
+    anteriores = {}
+    try:
+        with open(ruta_huellas(ruta_predicciones), encoding='utf-8') as f:
+            guardado = json.load(f)
+        if (guardado.get('semilla') == semilla and guardado.get('años') == AÑOS_PRED
+                and guardado.get('sha256_predicciones') == _sha256(ruta_predicciones)):
+            anteriores = guardado['grupos']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    encabezado, lineas_anteriores = _leer_lineas_por_grupo(ruta_predicciones)
+
+    cambiados = [
+        i for i, clave in enumerate(claves)
+        if anteriores.get(clave) != huellas[clave] or clave not in lineas_anteriores
+    ]
+
+    lineas_nuevas = {}
+    if cambiados:
+        df_nuevo = generar_predicciones_por_grupo(promedios.iloc[cambiados], semilla)
+        encabezado_nuevo, lineas_nuevas = _lineas_por_grupo(df_nuevo.to_csv(index=False).splitlines(keepends=True))
+        encabezado = encabezado or encabezado_nuevo
+
+    # Reescribir en el orden de los grupos, conservando las filas sin cambios
+    temporal = f"{ruta_predicciones}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8', newline='') as f:
+        f.write(encabezado)
+        for clave in claves:
+            f.writelines(lineas_nuevas.get(clave) or lineas_anteriores[clave])
+    os.replace(temporal, ruta_predicciones)
+
+    with open(ruta_huellas(ruta_predicciones), 'w', encoding='utf-8') as f:
+        json.dump({
+            'semilla': semilla,
+            'años': AÑOS_PRED,
+            'sha256_predicciones': _sha256(ruta_predicciones),
+            'grupos': huellas
+        }, f, ensure_ascii=False, indent=1)
+
+    return [claves[i] for i in cambiados]
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _leer_lineas_por_grupo(ruta):
+    """Encabezado y líneas crudas del CSV de predicciones agrupadas por 'Departamento|Sexo'"""
+    try:
+        with open(ruta, encoding='utf-8', newline='') as f:
+            return _lineas_por_grupo(f.readlines())
+    except FileNotFoundError:
+        return '', {}
+
+
+def _lineas_por_grupo(lineas):
+    if not lineas:
+        return '', {}
+    columnas = next(csv.reader([lineas[0]]))
+    i_dept, i_sexo = columnas.index('Departamento'), columnas.index('Sexo')
+
+    grupos = {}
+    for linea, campos in zip(lineas[1:], csv.reader(lineas[1:])):
+        grupos.setdefault(f"{campos[i_dept]}|{campos[i_sexo]}", []).append(linea)
+    return lineas[0], grupos
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generación de predicciones de VIH")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Regenerar solo los departamentos y sexos cuyo historial cambió")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla aleatoria")
+    args = parser.parse_args()
+
     print("🚀 Generando predicciones variables por año...")
-    
+
     # Verificar si existe el archivo de datos históricos
-    if not os.path.exists('DATASET_VIH.csv'):
+    if not os.path.exists(RUTA_HISTORICO):
         print("❌ No se encuentra DATASET_VIH.csv")
         return
-    
-    # Ejecutar el generador de predicciones
-    try:
-        result = subprocess.run([sys.executable, 'generar_predicciones_variables.py'], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ Predicciones generadas exitosamente")
-            print(result.stdout)
+
+    if args.incremental:
+        regenerados = regenerar_incremental(semilla=args.semilla)
+        if regenerados:
+            print(f"✅ Grupos regenerados ({len(regenerados)}): {', '.join(regenerados)}")
         else:
-            print("❌ Error generando predicciones:")
-            print(result.stderr)
-    
+            print("✅ Sin cambios en el historial; predicciones intactas")
+        print("\n🎯 Ahora ejecuta: streamlit run app_Version3.py")
+        return
+
+    # Ejecutar el generador de predicciones en este mismo proceso
+    try:
+        df_predicciones = generar_predicciones(RUTA_HISTORICO, semilla=args.semilla, salida=RUTA_PREDICCIONES)
+        print("✅ Predicciones generadas exitosamente")
+        mostrar_resumen(df_predicciones)
+
     except Exception as e:
-        print(f"❌ Error ejecutando el script: {e}")
-    
+        print(f"❌ Error generando predicciones: {e}")
+
     print("\n🎯 Ahora ejecuta: streamlit run app_Version3.py")
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import AÑOS_PRED, calcular_promedios, preparar_simulacion, simular_casos
+
+# Cuantiles reportados por grupo y año
+CUANTILES = [5, 50, 95]
+
+# Máximo de celdas simuladas (trayectorias × grupos × años) por lote
+MAX_CELDAS_LOTE = 2_000_000
+
+
+def generar_ensamble(n_trayectorias=10_000, ruta_historico='DATASET_VIH.csv',
+                     ruta_salida='ensamble_alerta_vih_2025_2030.csv', semilla=42,
+                     max_celdas_lote=MAX_CELDAS_LOTE):
+    """
+    Simula n_trayectorias realizaciones por departamento, sexo y año.
+
+    Los grupos se procesan por lotes: cada lote se simula en una sola pasada
+    vectorizada, se resume en cuantiles y probabilidad de alerta, y se agrega
+    al CSV de salida antes de pasar al siguiente, de modo que nunca se guardan
+    todas las trayectorias en memoria.
+    """
+    rng = np.random.default_rng(semilla)
+
+    df_hist = leer_tabla(ruta_historico, esquema=aplicar_esquema_historico)
+    promedios = calcular_promedios(df_hist)
+    base, variacion_total, umbral_alerta, brote_posible = preparar_simulacion(promedios, AÑOS_PRED)
+
+    grupos_por_lote = max(1, max_celdas_lote // (n_trayectorias * len(AÑOS_PRED)))
+
+    if os.path.exists(ruta_salida):
+        os.remove(ruta_salida)
+
+    total_filas = 0
+    for inicio in range(0, len(promedios), grupos_por_lote):
+        lote = slice(inicio, inicio + grupos_por_lote)
+        casos, alerta = simular_casos(
+            base[lote], variacion_total[lote], umbral_alerta[lote], brote_posible[lote],
+            rng=rng, n_trayectorias=n_trayectorias
+        )
+
+        resumen = _resumir_lote(promedios.iloc[lote], casos, alerta)
+        resumen.to_csv(ruta_salida, mode='a', header=(total_filas == 0), index=False)
+        total_filas += len(resumen)
+
+    return total_filas
+
+
+def _resumir_lote(promedios, casos, alerta):
+    """Reduce las trayectorias (trayectorias × grupos × años) a cuantiles y probabilidad de alerta"""
+    n_años = len(AÑOS_PRED)
+    percentiles = np.percentile(casos, CUANTILES, axis=0)
+
+    resumen = pd.DataFrame({
+        'Anio': np.tile(np.asarray(AÑOS_PRED), len(promedios)),
+        'Departamento': np.repeat(promedios['Departamento'].to_numpy(), n_años),
+        'Sexo': np.repeat(promedios['Sexo'].to_numpy(), n_años),
+        'PromHist': np.repeat(promedios['PromHist'].round(1).to_numpy(), n_años)
+    })
+    for cuantil, valores in zip(CUANTILES, percentiles):
+        resumen[f'Casos_P{cuantil}'] = valores.ravel()
+    resumen['ProbAlerta'] = alerta.mean(axis=0).ravel().round(4)
+
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ensamble Monte Carlo de predicciones de VIH")
+    parser.add_argument('--trayectorias', type=int, default=10_000, help="Trayectorias por grupo")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV de datos históricos")
+    parser.add_argument('--salida', default='ensamble_alerta_vih_2025_2030.csv', help="CSV de salida")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla aleatoria")
+    args = parser.parse_args()
+
+    print(f"🎲 Simulando {args.trayectorias:,} trayectorias por grupo...")
+    filas = generar_ensamble(args.trayectorias, args.historico, args.salida, args.semilla)
+
+    print(f"✅ Ensamble generado: {filas} registros en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import pandas as pd
+
+# Tipos compactos compartidos por las apps, el generador y las herramientas por lotes
+ESQUEMA_HISTORICO = {
+    'Anio': 'int16',
+    'Departamento': 'category',
+    'Sexo': 'category',
+    'CasosEstimados': 'int32',
+    'Tendencia': 'category'
+}
+
+ESQUEMA_PREDICCIONES = {
+    'Anio': 'int16',
+    'Departamento': 'category',
+    'Sexo': 'category',
+    'CasosEstimados_Predichos': 'int32',
+    'PromHist': 'float32',
+    'Alerta': 'bool'
+}
+
+# Valores aceptados para la columna de alerta cuando llega como texto
+_VALORES_ALERTA = {'True': True, 'False': False, True: True, False: False}
+
+
+def aplicar_esquema(df, esquema):
+    """
+    Convierte las columnas presentes de df a los tipos del esquema.
+
+    Las columnas numéricas o de alerta que llegan como texto se convierten y las
+    filas que no se pueden interpretar se descartan. Si la tabla ya tiene los
+    tipos del esquema no se hace ninguna copia.
+    """
+    columnas = [c for c in esquema if c in df.columns]
+    if all(str(df[c].dtype) == esquema[c] for c in columnas):
+        return df
+
+    df = df.copy()
+    convertidas = []
+    for columna in columnas:
+        tipo = esquema[columna]
+        if tipo == 'bool' and not pd.api.types.is_bool_dtype(df[columna]):
+            df[columna] = df[columna].map(_VALORES_ALERTA)
+            convertidas.append(columna)
+        elif tipo not in ('bool', 'category') and not pd.api.types.is_numeric_dtype(df[columna]):
+            df[columna] = pd.to_numeric(df[columna], errors='coerce')
+            convertidas.append(columna)
+
+    if convertidas:
+        df = df.dropna(subset=convertidas)
+
+    return df.astype({c: esquema[c] for c in columnas})
+
+
+def aplicar_esquema_historico(df):
+    """Aplica los tipos compactos a un DataFrame con el formato de DATASET_VIH.csv"""
+    return aplicar_esquema(df, ESQUEMA_HISTORICO)
+
+
+def aplicar_esquema_predicciones(df):
+    """Aplica los tipos compactos a un DataFrame con el formato del CSV de predicciones"""
+    return aplicar_esquema(df, ESQUEMA_PREDICCIONES)
+
+
+def reporte_memoria(tablas):
+    """
+    Compara la memoria de cada tabla antes y después de aplicar su esquema.
+
+    Recibe un diccionario nombre -> (df_original, df_tipado) y devuelve un
+    DataFrame con los bytes de cada uno (memory_usage con deep=True).
+    """
+    filas = []
+    for nombre, (original, tipado) in tablas.items():
+        antes = int(original.memory_usage(deep=True).sum())
+        despues = int(tipado.memory_usage(deep=True).sum())
+        filas.append({
+            'Tabla': nombre,
+            'Filas': len(tipado),
+            'BytesAntes': antes,
+            'BytesDespues': despues,
+            'Reduccion': round(antes / despues, 1) if despues else None
+        })
+    return pd.DataFrame(filas)
+
+
+if __name__ == "__main__":
+    tablas = {}
+    for nombre, ruta, aplicar in [
+        ('historico', 'DATASET_VIH.csv', aplicar_esquema_historico),
+        ('predicciones', 'predicciones_alerta_vih_2025_2030.csv', aplicar_esquema_predicciones)
+    ]:
+        try:
+            original = pd.read_csv(ruta)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            print(f"⚠️ No se pudo leer {ruta}")
+            continue
+        tablas[nombre] = (original, aplicar(original))
+
+    print("🧮 Memoria por tabla (bytes):")
+    print(reporte_memoria(tablas).to_string(index=False))
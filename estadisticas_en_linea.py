@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Sin pyarrow solo se pueden recorrer CSV
+    pa = None
+
+# Columnas que se necesitan del historial para las estadísticas por grupo
+CLAVES_GRUPO = ['Departamento', 'Sexo']
+COLUMNA_CASOS = 'CasosEstimados'
+
+# Filas por lote al recorrer un CSV
+TAMAÑO_LOTE = 500_000
+
+
+class EstadisticasPorGrupo:
+    """
+    Media y desviación estándar por (departamento, sexo) acumuladas por lotes.
+
+    Cada lote se resume con conteo, media y suma de cuadrados centrada (M2) por
+    grupo, y se combina con lo acumulado con la fórmula de Chan (la versión por
+    bloques del algoritmo de Welford). La memoria depende del número de grupos,
+    no del número de filas leídas.
+    """
+
+    def __init__(self):
+        self._n = pd.Series(dtype=float)
+        self._media = pd.Series(dtype=float)
+        self._m2 = pd.Series(dtype=float)
+
+    def agregar_lote(self, lote):
+        """Incorpora un DataFrame con columnas Departamento, Sexo y CasosEstimados"""
+        casos = pd.to_numeric(lote[COLUMNA_CASOS], errors='coerce')
+        validos = casos.notna()
+        if not validos.any():
+            return
+        claves = [lote.loc[validos, c].astype(str) for c in CLAVES_GRUPO]
+        grupos = casos[validos].astype(float).groupby(claves)
+        n_b = grupos.count().astype(float)
+        media_b = grupos.mean()
+        m2_b = grupos.var(ddof=0) * n_b
+        self._combinar(n_b, media_b, m2_b)
+
+    def _combinar(self, n_b, media_b, m2_b):
+        indice = self._n.index.union(n_b.index)
+        n_a = self._n.reindex(indice, fill_value=0.0)
+        media_a = self._media.reindex(indice, fill_value=0.0)
+        m2_a = self._m2.reindex(indice, fill_value=0.0)
+        n_b = n_b.reindex(indice, fill_value=0.0)
+        media_b = media_b.reindex(indice, fill_value=0.0)
+        m2_b = m2_b.reindex(indice, fill_value=0.0)
+
+        n = n_a + n_b
+        delta = media_b - media_a
+        self._n = n
+        self._media = media_a + delta * (n_b / n)
+        self._m2 = m2_a + m2_b + delta ** 2 * (n_a * n_b / n)
+
+    def resultado(self):
+        """
+        Promedios con el mismo formato que calcular_promedios: Departamento, Sexo,
+        PromHist y StdHist (desviación muestral, NaN con una sola observación).
+        """
+        n = self._n.to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(n > 1, np.sqrt(self._m2.to_numpy() / (n - 1)), np.nan)
+        promedios = pd.DataFrame({
+            'Departamento': self._n.index.get_level_values(0) if len(n) else [],
+            'Sexo': self._n.index.get_level_values(1) if len(n) else [],
+            'PromHist': self._media.to_numpy(),
+            'StdHist': std
+        })
+        return promedios.sort_values(CLAVES_GRUPO, kind='stable').reset_index(drop=True)
+
+    def estados(self):
+        """Diccionario (departamento, sexo) -> (n, media, M2) para continuar registro a registro"""
+        return {
+            clave: (n, media, m2)
+            for clave, n, media, m2 in zip(self._n.index, self._n.to_numpy(), self._media.to_numpy(), self._m2.to_numpy())
+        }
+
+    def __len__(self):
+        return len(self._n)
+
+
+def leer_por_lotes(fuente, tamaño_lote=TAMAÑO_LOTE):
+    """
+    Recorre el historial por lotes de DataFrames sin cargarlo completo.
+
+    fuente puede ser la ruta de un CSV, la de una copia Arrow IPC (.arrow o
+    .feather, que se lee con memoria mapeada lote a lote) o cualquier iterable
+    de DataFrames o RecordBatch de pyarrow.
+    """
+    columnas = CLAVES_GRUPO + [COLUMNA_CASOS]
+
+    if not isinstance(fuente, (str, os.PathLike)):
+        for lote in fuente:
+            yield lote if isinstance(lote, pd.DataFrame) else lote.to_pandas()
+        return
+
+    if os.path.splitext(fuente)[1] in ('.arrow', '.feather'):
+        if pa is None:
+            raise ImportError("Se necesita pyarrow para leer el formato columnar")
+        with pa.memory_map(str(fuente)) as archivo:
+            lector = pa.ipc.open_file(archivo)
+            for i in range(lector.num_record_batches):
+                yield lector.get_batch(i).select(columnas).to_pandas()
+        return
+
+    yield from pd.read_csv(fuente, usecols=columnas, chunksize=tamaño_lote)
+
+
+def calcular_promedios_en_linea(fuente, tamaño_lote=TAMAÑO_LOTE):
+    """Equivalente por lotes de calcular_promedios, con memoria acotada"""
+    estadisticas = EstadisticasPorGrupo()
+    for lote in leer_por_lotes(fuente, tamaño_lote):
+        estadisticas.agregar_lote(lote)
+    return estadisticas.resultado()
@@ -0,0 +1,184 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Sin pyarrow solo se puede escribir CSV
+    pa = None
+
+SEXOS = ['Femenino', 'Masculino']
+
+# Grupos de edad y su peso aproximado en los casos de VIH
+GRUPOS_EDAD = ['0-14', '15-24', '25-34', '35-44', '45-59', '60+']
+PESOS_EDAD = np.array([0.02, 0.20, 0.35, 0.23, 0.15, 0.05])
+
+# Variación relativa frente al mismo periodo del año anterior que se considera "Igual"
+TOLERANCIA_TENDENCIA = 0.05
+
+# Filas por lote al escribir
+FILAS_LOTE = 1_000_000
+
+
+def parametros_base(historico='DATASET_VIH.csv', departamentos=25, semilla=42):
+    """
+    Casos anuales medios por (departamento, sexo) que sirven de nivel base.
+
+    Se toman de DATASET_VIH.csv si existe; si no, se usan departamentos
+    genéricos con niveles log-normales.
+    """
+    if historico and os.path.exists(historico):
+        medias = pd.read_csv(historico).groupby(['Departamento', 'Sexo'])['CasosEstimados'].mean()
+        medias = medias.unstack('Sexo').reindex(columns=SEXOS).fillna(medias.mean())
+        return medias.index.to_numpy(), medias.to_numpy(dtype=float)
+
+    rng = np.random.default_rng(semilla)
+    nombres = np.array([f"Departamento {i + 1:02d}" for i in range(departamentos)])
+    return nombres, rng.lognormal(5, 1, (departamentos, len(SEXOS)))
+
+
+def generar_lotes(distritos=1, años=10, anio_inicio=2015, mensual=False, por_edad=False,
+                  historico='DATASET_VIH.csv', semilla=42, filas_lote=FILAS_LOTE):
+    """
+    Genera el historial sintético por lotes de DataFrames con el esquema de DATASET_VIH.csv.
+
+    Cada departamento se divide en `distritos` unidades (columna Distrito) con
+    participación, crecimiento anual y estacionalidad propios. Con mensual se
+    agrega la columna Mes y con por_edad la columna GrupoEdad. Cada lote reúne
+    todos los periodos de un bloque de distritos, así que la Tendencia se
+    calcula dentro del lote y la memoria queda acotada por filas_lote. Con la
+    misma semilla y el mismo filas_lote la salida es idéntica.
+    """
+    departamentos, niveles = parametros_base(historico, semilla=semilla)
+    rng = np.random.default_rng(semilla)
+
+    # Parámetros por unidad (departamentos × distritos), pequeños frente al total de filas
+    n_unidades = len(departamentos) * distritos
+    participacion = rng.dirichlet(np.full(distritos, 2.0), size=len(departamentos)).ravel()
+    nivel_unidad = np.repeat(niveles, distritos, axis=0) * participacion[:, np.newaxis]
+    crecimiento = rng.normal(0.02, 0.05, n_unidades)
+    fase = rng.uniform(0, 2 * np.pi, n_unidades)
+
+    anios = np.arange(anio_inicio, anio_inicio + años)
+    meses = np.arange(1, 13) if mensual else np.array([0])
+    edades = np.arange(len(GRUPOS_EDAD)) if por_edad else np.array([0])
+    pesos_edad = PESOS_EDAD if por_edad else np.ones(1)
+    filas_unidad = len(SEXOS) * len(anios) * len(meses) * len(edades)
+    unidades_lote = max(1, filas_lote // filas_unidad)
+
+    for n_lote, inicio in enumerate(range(0, n_unidades, unidades_lote)):
+        u = np.arange(inicio, min(inicio + unidades_lote, n_unidades))
+        rng_lote = np.random.default_rng([semilla, n_lote])
+
+        # Casos esperados con forma (unidades, sexos, años, meses, edades)
+        tendencia = (1 + crecimiento[u])[:, np.newaxis] ** (anios - anio_inicio)[np.newaxis, :]
+        if mensual:
+            estacional = 1 + 0.1 * np.sin(2 * np.pi * (meses - 1) / 12 + fase[u][:, np.newaxis])
+            estacional = estacional / estacional.sum(axis=1, keepdims=True)
+        else:
+            estacional = np.ones((len(u), 1))
+        esperado = (
+            nivel_unidad[u][:, :, None, None, None]
+            * tendencia[:, None, :, None, None]
+            * estacional[:, None, None, :, None]
+            * pesos_edad[None, None, None, None, :]
+        )
+        casos = rng_lote.poisson(esperado)
+
+        # Tendencia frente al mismo mes y grupo del año anterior
+        cambio = np.zeros(casos.shape)
+        anterior = casos[:, :, :-1].astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cambio[:, :, 1:] = np.where(anterior > 0, casos[:, :, 1:] / anterior - 1, 0.0)
+        tendencia_texto = np.where(cambio > TOLERANCIA_TENDENCIA, 'Incremento',
+                                   np.where(cambio < -TOLERANCIA_TENDENCIA, 'Decremento', 'Igual'))
+
+        forma = casos.shape
+        lote = {
+            'Anio': np.broadcast_to(anios[None, None, :, None, None], forma).ravel().astype(np.int16),
+            'Departamento': np.broadcast_to(
+                departamentos[u // distritos][:, None, None, None, None], forma
+            ).ravel()
+        }
+        if distritos > 1:
+            lote['Distrito'] = np.broadcast_to(
+                _nombres_distrito(departamentos, u, distritos)[:, None, None, None, None], forma
+            ).ravel()
+        lote['Sexo'] = np.broadcast_to(np.array(SEXOS)[None, :, None, None, None], forma).ravel()
+        if mensual:
+            lote['Mes'] = np.broadcast_to(meses[None, None, None, :, None], forma).ravel().astype(np.int8)
+        if por_edad:
+            lote['GrupoEdad'] = np.broadcast_to(
+                np.array(GRUPOS_EDAD)[None, None, None, None, :], forma
+            ).ravel()
+        lote['CasosEstimados'] = casos.ravel().astype(np.int32)
+        lote['Tendencia'] = tendencia_texto.ravel()
+        yield pd.DataFrame(lote)
+
+
+def _nombres_distrito(departamentos, unidades, distritos):
+    """Nombres de distrito únicos por departamento, p. ej. 'Lima D003'"""
+    return np.char.add(
+        np.char.add(departamentos[unidades // distritos].astype(str), ' D'),
+        np.char.zfill((unidades % distritos + 1).astype(str), 3)
+    )
+
+
+def escribir_datos(lotes, ruta):
+    """
+    Escribe los lotes en CSV o, si la ruta termina en .arrow/.feather, en Arrow IPC
+    lote a lote (sin compresión, para poder leerlo con memoria mapeada).
+    Devuelve el número de filas escritas.
+    """
+    filas = 0
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    if os.path.splitext(ruta)[1] in ('.arrow', '.feather'):
+        if pa is None:
+            raise ImportError("Se necesita pyarrow para escribir el formato columnar")
+        escritor = None
+        try:
+            for lote in lotes:
+                tabla = pa.Table.from_pandas(lote, preserve_index=False)
+                if escritor is None:
+                    esquema = tabla.schema.remove_metadata()
+                    escritor = pa.ipc.new_file(temporal, esquema)
+                escritor.write_table(tabla.cast(esquema))
+                filas += len(lote)
+        finally:
+            if escritor is not None:
+                escritor.close()
+    else:
+        for i, lote in enumerate(lotes):
+            lote.to_csv(temporal, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            filas += len(lote)
+    os.replace(temporal, ruta)
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de historiales sintéticos de VIH para pruebas de carga")
+    parser.add_argument('--salida', default='DATASET_VIH_sintetico.csv',
+                        help="Archivo de salida (.csv, o .arrow para el formato columnar)")
+    parser.add_argument('--distritos', type=int, default=75, help="Distritos por departamento")
+    parser.add_argument('--años', type=int, default=10)
+    parser.add_argument('--anio-inicio', type=int, default=2015)
+    parser.add_argument('--mensual', action='store_true', help="Un registro por mes en lugar de por año")
+    parser.add_argument('--por-edad', action='store_true', help="Estratificar por grupo de edad")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="Historial real para los niveles base")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--filas-lote', type=int, default=FILAS_LOTE)
+    args = parser.parse_args()
+
+    print(f"🧪 Generando datos sintéticos en {args.salida}...")
+    filas = escribir_datos(
+        generar_lotes(args.distritos, args.años, args.anio_inicio, args.mensual, args.por_edad,
+                      args.historico, args.semilla, args.filas_lote),
+        args.salida
+    )
+    print(f"✅ {filas:,} registros escritos")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,251 @@
+import argparse
+import zlib
 import pandas as pd
 import numpy as np
-import random
+from almacenamiento import guardar_tabla, leer_tabla
+from esquema import aplicar_esquema_historico, aplicar_esquema_predicciones
+from estadisticas_en_linea import calcular_promedios_en_linea
 
-# Configurar semilla para reproducibilidad
-np.random.seed(42)
-random.seed(42)
+# Semilla por defecto para reproducibilidad
+SEMILLA = 42
 
-def generar_predicciones_variables():
+# Años de predicción
+AÑOS_PRED = [2025, 2026, 2027, 2028, 2029, 2030]
+
+# Factores de variación por año (simulando diferentes escenarios epidemiológicos)
+FACTORES_AÑO = {
+    2025: {'base': 1.02, 'variacion': 0.05},  # Ligero incremento
+    2026: {'base': 1.01, 'variacion': 0.08},  # Estabilización con más variación
+    2027: {'base': 0.98, 'variacion': 0.06},  # Ligera reducción
+    2028: {'base': 1.05, 'variacion': 0.10},  # Incremento moderado
+    2029: {'base': 0.95, 'variacion': 0.07},  # Reducción por intervenciones
+    2030: {'base': 1.03, 'variacion': 0.09}   # Recuperación parcial
+}
+
+# Factores específicos por departamento (algunos tienen tendencias particulares)
+FACTORES_DEPT = {
+    'Lima': {'tendencia': 1.08, 'volatilidad': 0.12},      # Mayor crecimiento urbano
+    'Callao': {'tendencia': 1.06, 'volatilidad': 0.10},    # Puerto, mayor movilidad
+    'Loreto': {'tendencia': 1.04, 'volatilidad': 0.15},    # Zona fronteriza
+    'Madre de Dios': {'tendencia': 1.07, 'volatilidad': 0.18}, # Minería, migración
+    'Ucayali': {'tendencia': 1.05, 'volatilidad': 0.14},   # Zona de tránsito
+    'Arequipa': {'tendencia': 1.03, 'volatilidad': 0.08},  # Ciudad grande, estable
+    'La Libertad': {'tendencia': 1.04, 'volatilidad': 0.09}, # Costa norte
+    'Piura': {'tendencia': 1.02, 'volatilidad': 0.11},     # Frontera norte
+}
+
+# Factores por sexo
+FACTORES_SEXO = {
+    'Masculino': {'base': 1.02, 'variacion': 0.08},  # Ligeramente mayor riesgo
+    'Femenino': {'base': 0.98, 'variacion': 0.12}    # Mayor variabilidad
+}
+
+# Multiplicador de la desviación estándar para el umbral de alerta
+MULTIPLICADOR_ALERTA = 1.5
+
+# Departamentos donde se simulan brotes a partir de AÑO_INICIO_BROTE
+DEPARTAMENTOS_BROTE = ['Lima', 'Callao', 'Loreto']
+AÑO_INICIO_BROTE = 2028
+
+# Factores para departamentos sin tendencia particular
+FACTOR_DEPT_DEFECTO = {'tendencia': 1.0, 'volatilidad': 0.08}
+
+def generar_predicciones(historico='DATASET_VIH.csv', años_pred=AÑOS_PRED, semilla=SEMILLA, salida=None,
+                         tamaño_lote=None):
     """
     Genera predicciones que varían por año basadas en tendencias realistas
-    """
     
-    # Cargar datos históricos
-    df_hist = pd.read_csv('DATASET_VIH.csv')
+    historico puede ser la ruta del CSV de datos históricos o un DataFrame ya
+    cargado. Si se indica salida (.csv o .arrow) el resultado también se guarda
+    en disco; en cualquier caso se devuelve el DataFrame de predicciones.
+    
+    Con tamaño_lote el historial se recorre por lotes (ver estadisticas_en_linea)
+    sin cargarlo completo en memoria; historico puede ser entonces también un
+    iterable de DataFrames o RecordBatch.
+    """
     
     # Calcular promedios históricos por departamento y sexo
-    promedios = df_hist.groupby(['Departamento', 'Sexo'])['CasosEstimados'].agg(['mean', 'std']).reset_index()
+    if tamaño_lote and not isinstance(historico, pd.DataFrame):
+        promedios = calcular_promedios_en_linea(historico, tamaño_lote)
+    else:
+        # Cargar datos históricos
+        if isinstance(historico, pd.DataFrame):
+            df_hist = aplicar_esquema_historico(historico)
+        else:
+            df_hist = leer_tabla(historico, esquema=aplicar_esquema_historico)
+        promedios = calcular_promedios(df_hist)
+    
+    # Alinear los factores en matrices (grupos × años) y simular en bloque
+    rng = np.random.default_rng(semilla)
+    base, variacion_total, umbral_alerta, brote_posible = preparar_simulacion(promedios, años_pred)
+    casos_pred, alerta = simular_casos(base, variacion_total, umbral_alerta, brote_posible, rng=rng)
+    
+    df_predicciones = armar_predicciones(promedios, años_pred, casos_pred, alerta)
+    if salida:
+        guardar_tabla(df_predicciones, salida)
+    return df_predicciones
+
+
+def generar_predicciones_variables():
+    """Genera las predicciones a partir de DATASET_VIH.csv con la semilla por defecto"""
+    return generar_predicciones('DATASET_VIH.csv')
+
+
+def generar_predicciones_por_grupo(promedios, semilla, años_pred=AÑOS_PRED):
+    """
+    Genera las predicciones con un generador aleatorio propio para cada grupo.
+    
+    La semilla de cada (departamento, sexo) se deriva de la semilla global y del
+    nombre del grupo, así que sus filas no dependen de qué otros grupos se
+    generen en la misma corrida. Es la base de la regeneración incremental.
+    """
+    base, variacion_total, umbral_alerta, brote_posible = preparar_simulacion(promedios, años_pred)
+    casos_pred = np.empty(base.shape, dtype=np.int64)
+    alerta = np.empty(base.shape, dtype=bool)
+    
+    for i, (dept, sexo) in enumerate(zip(promedios['Departamento'], promedios['Sexo'])):
+        rng = np.random.default_rng([semilla, zlib.crc32(f"{dept}|{sexo}".encode('utf-8'))])
+        casos_pred[i], alerta[i] = simular_casos(
+            base[i], variacion_total[i], umbral_alerta[i], brote_posible[i], rng=rng
+        )
+    
+    return armar_predicciones(promedios, años_pred, casos_pred, alerta)
+
+
+def calcular_promedios(df_hist):
+    """Promedio y desviación estándar históricos por departamento y sexo"""
+    promedios = df_hist.groupby(['Departamento', 'Sexo'], observed=True)['CasosEstimados'].agg(['mean', 'std']).reset_index()
     promedios.columns = ['Departamento', 'Sexo', 'PromHist', 'StdHist']
+    return promedios
+
+
+def preparar_simulacion(promedios, años_pred, factores_año=FACTORES_AÑO,
+                        factores_dept=FACTORES_DEPT, factores_sexo=FACTORES_SEXO,
+                        multiplicador_alerta=MULTIPLICADOR_ALERTA):
+    """
+    Prepara las matrices (grupos × años) que consume simular_casos.
     
-    # Años de predicción
-    años_pred = [2025, 2026, 2027, 2028, 2029, 2030]
-    
-    # Factores de variación por año (simulando diferentes escenarios epidemiológicos)
-    factores_año = {
-        2025: {'base': 1.02, 'variacion': 0.05},  # Ligero incremento
-        2026: {'base': 1.01, 'variacion': 0.08},  # Estabilización con más variación
-        2027: {'base': 0.98, 'variacion': 0.06},  # Ligera reducción
-        2028: {'base': 1.05, 'variacion': 0.10},  # Incremento moderado
-        2029: {'base': 0.95, 'variacion': 0.07},  # Reducción por intervenciones
-        2030: {'base': 1.03, 'variacion': 0.09}   # Recuperación parcial
-    }
-    
-    # Factores específicos por departamento (algunos tienen tendencias particulares)
-    factores_dept = {
-        'Lima': {'tendencia': 1.08, 'volatilidad': 0.12},      # Mayor crecimiento urbano
-        'Callao': {'tendencia': 1.06, 'volatilidad': 0.10},    # Puerto, mayor movilidad
-        'Loreto': {'tendencia': 1.04, 'volatilidad': 0.15},    # Zona fronteriza
-        'Madre de Dios': {'tendencia': 1.07, 'volatilidad': 0.18}, # Minería, migración
-        'Ucayali': {'tendencia': 1.05, 'volatilidad': 0.14},   # Zona de tránsito
-        'Arequipa': {'tendencia': 1.03, 'volatilidad': 0.08},  # Ciudad grande, estable
-        'La Libertad': {'tendencia': 1.04, 'volatilidad': 0.09}, # Costa norte
-        'Piura': {'tendencia': 1.02, 'volatilidad': 0.11},     # Frontera norte
-    }
-    
-    # Factores por sexo
-    factores_sexo = {
-        'Masculino': {'base': 1.02, 'variacion': 0.08},  # Ligeramente mayor riesgo
-        'Femenino': {'base': 0.98, 'variacion': 0.12}    # Mayor variabilidad
-    }
-    
-    predicciones = []
-    
-    for _, row in promedios.iterrows():
-        dept = row['Departamento']
-        sexo = row['Sexo']
-        prom_hist = row['PromHist']
-        std_hist = row['StdHist']
-        
-        # Obtener factores específicos
-        factor_dept = factores_dept.get(dept, {'tendencia': 1.0, 'volatilidad': 0.08})
-        factor_sexo = factores_sexo[sexo]
-        
-        for año in años_pred:
-            factor_año = factores_año[año]
-            
-            # Calcular predicción base
-            prediccion_base = prom_hist * factor_año['base'] * factor_dept['tendencia'] * factor_sexo['base']
-            
-            # Agregar variación aleatoria controlada
-            variacion_total = factor_año['variacion'] + factor_dept['volatilidad'] + factor_sexo['variacion']
-            variacion = np.random.normal(0, variacion_total)
-            
-            # Aplicar variación
-            casos_pred = prediccion_base * (1 + variacion)
-            
-            # Asegurar que sea un número entero positivo
-            casos_pred = max(1, int(round(casos_pred)))
-            
-            # Calcular si hay alerta (si supera promedio + 1.5 * desviación estándar)
-            umbral_alerta = prom_hist + (1.5 * std_hist)
-            alerta = casos_pred > umbral_alerta
-            
-            # Agregar tendencia temporal adicional para algunos departamentos
-            if dept in ['Lima', 'Callao', 'Loreto'] and año >= 2028:
-                # Simular brote en años posteriores
-                if np.random.random() < 0.3:  # 30% probabilidad
-                    casos_pred = int(casos_pred * np.random.uniform(1.2, 1.8))
-                    alerta = True
-            
-            predicciones.append({
-                'Anio': año,
-                'Departamento': dept,
-                'Sexo': sexo,
-                'CasosEstimados_Predichos': casos_pred,
-                'PromHist': round(prom_hist, 1),
-                'Alerta': alerta
-            })
-    
-    return pd.DataFrame(predicciones)
-
-# Generar las predicciones
-print("Generando predicciones variables por año...")
-df_predicciones = generar_predicciones_variables()
-
-# Guardar el archivo
-df_predicciones.to_csv('predicciones_alerta_vih_2025_2030.csv', index=False)
-
-print(f"✅ Predicciones generadas: {len(df_predicciones)} registros")
-print(f"📊 Años: {sorted(df_predicciones['Anio'].unique())}")
-print(f"🏛️ Departamentos: {len(df_predicciones['Departamento'].unique())}")
-print(f"🚨 Alertas generadas: {df_predicciones['Alerta'].sum()}")
-
-# Mostrar algunos ejemplos
-print("\n📋 Ejemplos de predicciones por año (Amazonas - Masculino):")
-ejemplo = df_predicciones[
-    (df_predicciones['Departamento'] == 'Amazonas') & 
-    (df_predicciones['Sexo'] == 'Masculino')
-].sort_values('Anio')
-
-for _, row in ejemplo.iterrows():
-    alerta_text = "🚨 ALERTA" if row['Alerta'] else "✅ Normal"
-    print(f"  {row['Anio']}: {row['CasosEstimados_Predichos']} casos - {alerta_text}")
-
-print("\n📋 Ejemplos de predicciones por año (Lima - Masculino):")
-ejemplo_lima = df_predicciones[
-    (df_predicciones['Departamento'] == 'Lima') & 
-    (df_predicciones['Sexo'] == 'Masculino')
-].sort_values('Anio')
-
-for _, row in ejemplo_lima.iterrows():
-    alerta_text = "🚨 ALERTA" if row['Alerta'] else "✅ Normal"
-    print(f"  {row['Anio']}: {row['CasosEstimados_Predichos']} casos - {alerta_text}")
+    Devuelve la predicción base, la desviación de la variación aleatoria,
+    el umbral de alerta por grupo y la máscara de celdas donde puede haber brote.
+    """
+    base, variacion_total = _matrices_factores(promedios, años_pred, factores_año, factores_dept, factores_sexo)
+    umbral_alerta = (promedios['PromHist'] + multiplicador_alerta * promedios['StdHist']).to_numpy(dtype=float)
+    brote_posible = np.outer(
+        promedios['Departamento'].isin(DEPARTAMENTOS_BROTE).to_numpy(),
+        np.asarray(años_pred) >= AÑO_INICIO_BROTE
+    )
+    return base, variacion_total, umbral_alerta, brote_posible
+
+
+def _matrices_factores(promedios, años_pred, factores_año, factores_dept, factores_sexo):
+    """
+    Convierte los diccionarios de factores en matrices alineadas (grupos × años).
+    
+    Devuelve la predicción base y la desviación total de la variación aleatoria.
+    """
+    faltantes_año = [año for año in años_pred if año not in factores_año]
+    if faltantes_año:
+        raise KeyError(f"Sin factores para los años: {faltantes_año} (disponibles: {sorted(factores_año)})")
+    
+    base_año = np.array([factores_año[año]['base'] for año in años_pred], dtype=float)
+    variacion_año = np.array([factores_año[año]['variacion'] for año in años_pred], dtype=float)
+    
+    # Departamentos sin factor específico usan los valores por defecto
+    tendencia_dept = promedios['Departamento'].map(
+        {dept: f['tendencia'] for dept, f in factores_dept.items()}
+    ).fillna(FACTOR_DEPT_DEFECTO['tendencia']).to_numpy(dtype=float)
+    volatilidad_dept = promedios['Departamento'].map(
+        {dept: f['volatilidad'] for dept, f in factores_dept.items()}
+    ).fillna(FACTOR_DEPT_DEFECTO['volatilidad']).to_numpy(dtype=float)
+    
+    base_sexo = promedios['Sexo'].map({sexo: f['base'] for sexo, f in factores_sexo.items()})
+    variacion_sexo = promedios['Sexo'].map({sexo: f['variacion'] for sexo, f in factores_sexo.items()})
+    if base_sexo.isna().any():
+        faltantes = sorted(promedios.loc[base_sexo.isna(), 'Sexo'].unique())
+        raise KeyError(f"Sin factores para el sexo: {faltantes}")
+    
+    prom_hist = promedios['PromHist'].to_numpy(dtype=float)
+    factor_grupo = tendencia_dept * base_sexo.to_numpy(dtype=float)
+    base = (prom_hist * factor_grupo)[:, np.newaxis] * base_año[np.newaxis, :]
+    variacion_total = (volatilidad_dept + variacion_sexo.to_numpy(dtype=float))[:, np.newaxis] + variacion_año[np.newaxis, :]
+    
+    return base, variacion_total
+
+
+def simular_casos(base, variacion_total, umbral_alerta, brote_posible, rng=np.random, n_trayectorias=None):
+    """
+    Simula los casos predichos y las alertas para toda la matriz (grupos × años).
+    
+    La alerta se evalúa antes de inyectar los brotes; toda celda con brote queda en alerta.
+    Con n_trayectorias se simulan varias realizaciones a la vez y el resultado
+    tiene forma (trayectorias × grupos × años).
+    """
+    forma = base.shape if n_trayectorias is None else (n_trayectorias,) + base.shape
+    
+    # Variación aleatoria controlada y casos enteros positivos
+    variacion = rng.normal(0, variacion_total, size=forma)
+    casos_pred = np.maximum(1, np.round(base * (1 + variacion))).astype(np.int64)
+    
+    # Alerta si supera promedio + k * desviación estándar (NaN nunca alerta)
+    alerta = casos_pred > np.asarray(umbral_alerta, dtype=float)[..., np.newaxis]
+    
+    # Simular brotes (30% de probabilidad) en los departamentos y años marcados
+    brote = brote_posible & (rng.random(forma) < 0.3)
+    intensidad = rng.uniform(1.2, 1.8, forma)
+    casos_pred = np.where(brote, (casos_pred * intensidad).astype(np.int64), casos_pred)
+    
+    return casos_pred, alerta | brote
+
+
+def armar_predicciones(promedios, años_pred, casos_pred, alerta):
+    """Aplana la matriz (grupos × años) al esquema del CSV de predicciones"""
+    n_años = len(años_pred)
+    return aplicar_esquema_predicciones(pd.DataFrame({
+        'Anio': np.tile(np.asarray(años_pred), len(promedios)),
+        'Departamento': np.repeat(promedios['Departamento'].to_numpy(), n_años),
+        'Sexo': np.repeat(promedios['Sexo'].to_numpy(), n_años),
+        'CasosEstimados_Predichos': casos_pred.ravel(),
+        'PromHist': np.repeat(promedios['PromHist'].round(1).to_numpy(), n_años),
+        'Alerta': alerta.ravel()
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de predicciones de VIH 2025-2030")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV de datos históricos")
+    parser.add_argument('--salida', default='predicciones_alerta_vih_2025_2030.csv',
+                        help="Archivo de salida (.csv, o .arrow para el formato columnar)")
+    parser.add_argument('--semilla', type=int, default=SEMILLA, help="Semilla aleatoria")
+    parser.add_argument('--años', type=int, nargs='+', default=AÑOS_PRED, choices=sorted(FACTORES_AÑO),
+                        metavar='AÑO', help=f"Años a predecir (con factores definidos: {min(FACTORES_AÑO)}-{max(FACTORES_AÑO)})")
+    parser.add_argument('--lote', type=int, default=None,
+                        help="Leer el historial por lotes de este número de filas (memoria acotada)")
+    args = parser.parse_args()
+
+    # Generar y guardar las predicciones
+    print("Generando predicciones variables por año...")
+    df_predicciones = generar_predicciones(args.historico, args.años, args.semilla, args.salida, args.lote)
+    mostrar_resumen(df_predicciones)
+
+
+def mostrar_resumen(df_predicciones):
+    """Imprime el resumen de una generación con ejemplos por año"""
+    print(f"✅ Predicciones generadas: {len(df_predicciones)} registros")
+    print(f"📊 Años: {sorted(df_predicciones['Anio'].unique().tolist())}")
+    print(f"🏛️ Departamentos: {df_predicciones['Departamento'].nunique()}")
+    print(f"🚨 Alertas generadas: {df_predicciones['Alerta'].sum()}")
+
+    for dept in ['Amazonas', 'Lima']:
+        print(f"\n📋 Ejemplos de predicciones por año ({dept} - Masculino):")
+        ejemplo = df_predicciones[
+            (df_predicciones['Departamento'] == dept) & 
+            (df_predicciones['Sexo'] == 'Masculino')
+        ].sort_values('Anio')
+
+        for año, casos, alerta in zip(ejemplo['Anio'], ejemplo['CasosEstimados_Predichos'], ejemplo['Alerta']):
+            alerta_text = "🚨 ALERTA" if alerta else "✅ Normal"
+            print(f"  {año}: {casos} casos - {alerta_text}")
+
+
+if __name__ == "__main__":
+    main()
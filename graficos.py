@@ -0,0 +1,184 @@
+import altair as alt
+import pandas as pd
+
+
+def datos_grafico(hist_filtrado, pred_filtrado):
+    """Une histórico y predicción de un departamento y sexo en una tabla Anio, Casos, Tipo"""
+    df_hist_viz = hist_filtrado[['Anio', 'CasosEstimados']].rename(columns={'CasosEstimados': 'Casos'})
+    df_hist_viz['Tipo'] = 'Histórico'
+    
+    df_pred_viz = pred_filtrado[['Anio', 'CasosEstimados_Predichos']].rename(columns={'CasosEstimados_Predichos': 'Casos'})
+    df_pred_viz['Tipo'] = 'Predicción'
+    
+    return pd.concat([df_hist_viz, df_pred_viz]).sort_values('Anio').reset_index(drop=True)
+
+
+def construir_grafico(tipo_grafico, df_completo, year, departamento, sexo, prom_hist, casos_pred):
+    """Construye el gráfico Altair del tipo seleccionado para un departamento y sexo"""
+    # Gráfico de Barras - Solo año seleccionado
+    if tipo_grafico == "Barras":
+        # Datos para el año seleccionado
+        datos_barras = pd.DataFrame({
+            'Categoría': ['Promedio histórico', f'Predicción {year}'],
+            'Casos': [prom_hist, casos_pred],
+            'Color': ['Promedio', 'Predicción']
+        })
+
+        chart = alt.Chart(datos_barras).mark_bar(size=60).encode(
+            x=alt.X('Categoría:N', title='', axis=alt.Axis(labelAngle=0)),
+            y=alt.Y('Casos:Q', title='Número de Casos'),
+            color=alt.Color('Color:N', 
+                          scale=alt.Scale(domain=['Promedio', 'Predicción'], 
+                                        range=["#1f77b4", "#ff7f0e"]),
+                          legend=alt.Legend(title="Tipo")),
+            tooltip=['Categoría', 'Casos']
+        ).properties(
+            title=f"Comparación para {departamento} - {sexo} - {year}",
+            width=600,
+            height=400
+        )
+
+    # Gráfico de Líneas
+    elif tipo_grafico == "Líneas":
+        # Resaltar el año seleccionado (sin modificar la tabla del llamador)
+        df_completo = df_completo.assign(Destacado=df_completo['Anio'] == year)
+
+        # Línea base
+        base_chart = alt.Chart(df_completo).mark_line(point=True, strokeWidth=2).encode(
+            x=alt.X('Anio:O', title='Año'),
+            y=alt.Y('Casos:Q', title='Número de Casos'),
+            color=alt.Color('Tipo:N', 
+                          scale=alt.Scale(domain=['Histórico', 'Predicción'], 
+                                        range=['#1f77b4', '#d62728']),
+                          legend=alt.Legend(title="Tipo de Dato")),
+            tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
+        )
+
+        # Punto destacado para el año seleccionado
+        highlight_chart = alt.Chart(df_completo[df_completo['Destacado']]).mark_circle(
+            size=200, stroke='black', strokeWidth=2
+        ).encode(
+            x='Anio:O',
+            y='Casos:Q',
+            color=alt.Color('Tipo:N', 
+                          scale=alt.Scale(domain=['Histórico', 'Predicción'], 
+                                        range=['#1f77b4', '#d62728'])),
+            tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
+        )
+
+        chart = (base_chart + highlight_chart).properties(
+            title=f"Evolución de casos - {departamento} - {sexo} (Año destacado: {year})",
+            width=700,
+            height=400
+        ).resolve_scale(color='independent')
+
+    # Gráfico de Área
+    else:  # Área
+        chart = alt.Chart(df_completo).mark_area(opacity=0.7, line=True).encode(
+            x=alt.X('Anio:O', title='Año'),
+            y=alt.Y('Casos:Q', title='Número de Casos'),
+            color=alt.Color('Tipo:N', 
+                          scale=alt.Scale(domain=['Histórico', 'Predicción'], 
+                                        range=['#1f77b4', '#d62728']),
+                          legend=alt.Legend(title="Tipo de Dato")),
+            tooltip=['Anio:O', 'Casos:Q', 'Tipo:N']
+        ).properties(
+            title=f"Tendencia de casos - {departamento} - {sexo}",
+            width=700,
+            height=400
+        )
+
+    return chart
+
+
+def construir_grafico_anual(tipo_grafico, all_years_data, year, departamento, sexo, prom_hist):
+    """Gráfico Altair de app_Version3: solo los años predichos de un departamento y sexo, con el año destacado"""
+    # Gráfico de Barras - Todos los años
+    if tipo_grafico == "Barras":
+        # Preparar datos para el gráfico de barras
+        chart_data = all_years_data.copy()
+        chart_data['Destacado'] = chart_data['Anio'] == year
+        # Etiquetas de la leyenda como valores del campo (Legend no admite una lista de etiquetas)
+        chart_data['Seleccionado'] = chart_data['Destacado'].map({True: 'Sí', False: 'No'})
+        
+        chart = alt.Chart(chart_data).mark_bar(size=60).encode(
+            x=alt.X('Anio:O', title='Año'),
+            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
+            color=alt.Color(
+                'Seleccionado:N',
+                scale=alt.Scale(domain=['Sí', 'No'], range=['#ff7f0e', '#1f77b4']),
+                legend=alt.Legend(title="Año Seleccionado")
+            ),
+            stroke=alt.condition(
+                alt.datum.Destacado == True,
+                alt.value('black'),
+                alt.value('transparent')
+            ),
+            strokeWidth=alt.condition(
+                alt.datum.Destacado == True,
+                alt.value(3),
+                alt.value(0)
+            ),
+            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
+        ).properties(
+            title=f"Predicciones por Año - {departamento} ({sexo}) - Destacado: {year}",
+            width=700,
+            height=400
+        )
+
+    # Gráfico de Líneas
+    elif tipo_grafico == "Líneas":
+        # Línea base
+        base_chart = alt.Chart(all_years_data).mark_line(point=True, strokeWidth=3).encode(
+            x=alt.X('Anio:O', title='Año'),
+            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
+            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
+        )
+        
+        # Punto destacado para el año seleccionado
+        highlight_data = all_years_data[all_years_data['Anio'] == year]
+        highlight_chart = alt.Chart(highlight_data).mark_circle(
+            size=400, stroke='red', strokeWidth=4, color='orange'
+        ).encode(
+            x='Anio:O',
+            y='CasosEstimados_Predichos:Q',
+            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
+        )
+        
+        # Línea de promedio histórico
+        prom_line = alt.Chart(pd.DataFrame({'y': [prom_hist]})).mark_rule(
+            color='green', strokeDash=[5, 5], strokeWidth=2
+        ).encode(
+            y='y:Q'
+        )
+        
+        chart = (base_chart + highlight_chart + prom_line).properties(
+            title=f"Evolución Temporal - {departamento} ({sexo}) - Año Destacado: {year}",
+            width=800,
+            height=450
+        )
+
+    # Gráfico de Área
+    else:  # Área
+        chart = alt.Chart(all_years_data).mark_area(opacity=0.7, line=True).encode(
+            x=alt.X('Anio:O', title='Año'),
+            y=alt.Y('CasosEstimados_Predichos:Q', title='Casos Predichos'),
+            tooltip=['Anio:O', 'CasosEstimados_Predichos:Q', 'Alerta:N']
+        ).properties(
+            title=f"Tendencia de Casos - {departamento} ({sexo})",
+            width=800,
+            height=450
+        )
+        
+        # Agregar punto destacado
+        highlight_data = all_years_data[all_years_data['Anio'] == year]
+        highlight_point = alt.Chart(highlight_data).mark_circle(
+            size=300, stroke='red', strokeWidth=3, color='orange'
+        ).encode(
+            x='Anio:O',
+            y='CasosEstimados_Predichos:Q'
+        )
+        
+        chart = chart + highlight_point
+
+    return chart
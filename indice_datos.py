@@ -0,0 +1,77 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Columnas por las que se indexan los datos históricos y de predicción
+CLAVES_GRUPO = ['Departamento', 'Sexo']
+CLAVES_AÑO = ['Departamento', 'Sexo', 'Anio']
+
+
+def construir_indice(df_pred, df_hist=None):
+    """
+    Construye el índice de consulta de los dashboards.
+
+    Cada tabla se ordena una sola vez por departamento, sexo y año, y se guardan
+    las posiciones de inicio y fin de cada (departamento, sexo) y de cada
+    (departamento, sexo, año). Las consultas son búsquedas en diccionario que
+    devuelven rebanadas ya ordenadas, sin recorrer las filas de la tabla.
+    """
+    return {
+        'pred': _indexar_tabla(df_pred),
+        'hist': _indexar_tabla(df_hist),
+        'version': version_datos(df_pred, df_hist)
+    }
+
+
+def version_datos(*tablas):
+    """Huella del contenido de las tablas, usada como versión del conjunto de datos"""
+    h = hashlib.sha256()
+    for df in tablas:
+        if df is not None and len(df):
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def _indexar_tabla(df):
+    if df is None or not set(CLAVES_AÑO).issubset(df.columns):
+        return {'datos': pd.DataFrame() if df is None else df.iloc[0:0], 'grupos': {}, 'años': {}}
+
+    datos = df.sort_values(CLAVES_AÑO, kind='stable').reset_index(drop=True)
+    valores = [datos[columna].to_numpy() for columna in CLAVES_AÑO]
+
+    # Posiciones donde cambia el grupo (departamento, sexo) y donde cambia el año
+    cambio_grupo = np.zeros(len(datos), dtype=bool)
+    cambio_grupo[:1] = True
+    for v in valores[:2]:
+        cambio_grupo[1:] |= v[1:] != v[:-1]
+    cambio_año = cambio_grupo.copy()
+    cambio_año[1:] |= valores[2][1:] != valores[2][:-1]
+
+    return {
+        'datos': datos,
+        'grupos': _rangos(valores[:2], cambio_grupo),
+        'años': _rangos(valores, cambio_año)
+    }
+
+
+def _rangos(valores, cambio):
+    """Diccionario clave -> (inicio, fin) a partir de los puntos de cambio"""
+    inicios = np.flatnonzero(cambio)
+    fines = np.append(inicios[1:], len(cambio))
+    claves = zip(*(v[inicios].tolist() for v in valores))
+    return dict(zip(claves, zip(inicios.tolist(), fines.tolist())))
+
+
+def obtener_grupo(indice, tabla, departamento, sexo):
+    """Filas de la tabla ('pred' o 'hist') para un departamento y sexo, ordenadas por año"""
+    entrada = indice[tabla]
+    inicio, fin = entrada['grupos'].get((departamento, sexo), (0, 0))
+    return entrada['datos'].iloc[inicio:fin]
+
+
+def obtener_año(indice, tabla, año, departamento, sexo):
+    """Filas de la tabla ('pred' o 'hist') para un año, departamento y sexo"""
+    entrada = indice[tabla]
+    inicio, fin = entrada['años'].get((departamento, sexo, año), (0, 0))
+    return entrada['datos'].iloc[inicio:fin]
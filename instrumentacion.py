@@ -0,0 +1,97 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# Activación: variable de entorno o parámetro de la URL (?perf=1)
+VARIABLE_ENTORNO = 'VIH_INSTRUMENTACION'
+PARAMETRO_URL = 'perf'
+
+# Si se define, cada ejecución se agrega como una línea JSON a este archivo
+VARIABLE_LOG = 'VIH_INSTRUMENTACION_LOG'
+
+_VALORES_ACTIVOS = ('1', 'true', 'si', 'sí', 'on')
+
+
+def _parametro_url(nombre):
+    """Valor de un parámetro de la URL; st.query_params solo existe desde Streamlit 1.30"""
+    if hasattr(st, 'query_params'):
+        return st.query_params.get(nombre, '')
+    return st.experimental_get_query_params().get(nombre, [''])[0]
+
+
+class Instrumentacion:
+    """
+    Tiempos por etapa de una ejecución (rerun) de un dashboard de Streamlit.
+
+    Desactivada no mide nada: etapa() devuelve un contexto vacío. Activada,
+    acumula el tiempo de cada etapa (las que se repiten en un bucle se suman),
+    guarda anotaciones como aciertos o fallos de caché y al final muestra un
+    panel plegable y opcionalmente agrega la ejecución a un log JSONL.
+    """
+
+    def __init__(self, script, activa=False, ruta_log=None):
+        self.script = script
+        self.activa = activa
+        self.ruta_log = ruta_log
+        self.etapas = {}
+        self.anotaciones = {}
+        self._inicio = time.perf_counter()
+
+    @classmethod
+    def desde_streamlit(cls, script):
+        """Crea la instrumentación según la variable de entorno o el parámetro ?perf= de la URL"""
+        activa = (
+            os.environ.get(VARIABLE_ENTORNO, '').lower() in _VALORES_ACTIVOS
+            or _parametro_url(PARAMETRO_URL).lower() in _VALORES_ACTIVOS
+        )
+        return cls(script, activa, os.environ.get(VARIABLE_LOG) or None)
+
+    def etapa(self, nombre):
+        """Contexto que mide una etapa: with instrumentacion.etapa('filtrado'): ..."""
+        return self._medir(nombre) if self.activa else nullcontext()
+
+    @contextmanager
+    def _medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    def anotar(self, clave, valor):
+        """Guarda un dato de la ejecución, p. ej. anotar('load_data', 'fallo de caché')"""
+        if self.activa:
+            self.anotaciones[clave] = valor
+
+    def tiempos(self):
+        """Tiempos en milisegundos por etapa, más el total de la ejecución"""
+        filas = [{'Etapa': nombre, 'ms': round(segundos * 1000, 2)} for nombre, segundos in self.etapas.items()]
+        filas.append({'Etapa': 'Total', 'ms': round((time.perf_counter() - self._inicio) * 1000, 2)})
+        return pd.DataFrame(filas)
+
+    def finalizar(self):
+        """Muestra el panel de tiempos y escribe el log si está configurado"""
+        if not self.activa:
+            return
+        tiempos = self.tiempos()
+
+        # El script va en el título: los fragmentos tienen su propio panel
+        with st.expander(f"⏱️ Tiempos de esta ejecución ({self.script})", expanded=False):
+            st.dataframe(tiempos, use_container_width=True, hide_index=True)
+            for clave, valor in self.anotaciones.items():
+                st.write(f"• **{clave}:** {valor}")
+
+        if self.ruta_log:
+            registro = {
+                'fecha': datetime.now().isoformat(timespec='milliseconds'),
+                'script': self.script,
+                'etapas_ms': dict(zip(tiempos['Etapa'], tiempos['ms'])),
+                'anotaciones': self.anotaciones
+            }
+            with open(self.ruta_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
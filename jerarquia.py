@@ -0,0 +1,202 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from cubo_agregados import TOTAL
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import AÑOS_PRED, calcular_promedios
+from pronostico import METODOS, matriz_series
+
+# Macrorregiones del Perú usadas para los totales intermedios
+MACROREGIONES = {
+    'Norte': ['Tumbes', 'Piura', 'Lambayeque', 'La Libertad', 'Cajamarca', 'Ancash'],
+    'Lima y Callao': ['Lima', 'Callao'],
+    'Centro': ['Junin', 'Pasco', 'Huanuco', 'Huancavelica', 'Ica'],
+    'Sur': ['Arequipa', 'Moquegua', 'Tacna', 'Puno', 'Cusco', 'Apurimac', 'Ayacucho'],
+    'Oriente': ['Loreto', 'Ucayali', 'San Martin', 'Amazonas', 'Madre de Dios']
+}
+
+# Macrorregión de los departamentos que no figuran arriba
+MACROREGION_DEFECTO = 'Otras'
+
+# Niveles de la jerarquía, del total nacional a la serie base (departamento × sexo)
+NIVELES = [
+    ('Nacional', []),
+    ('Nacional × Sexo', ['Sexo']),
+    ('Macrorregión', ['Macrorregion']),
+    ('Macrorregión × Sexo', ['Macrorregion', 'Sexo']),
+    ('Departamento', ['Macrorregion', 'Departamento']),
+    ('Departamento × Sexo', ['Macrorregion', 'Departamento', 'Sexo'])
+]
+
+_COLUMNAS_NODO = ['Macrorregion', 'Departamento', 'Sexo']
+
+
+def macrorregion(departamentos):
+    """Macrorregión de cada departamento"""
+    mapa = {dept: region for region, depts in MACROREGIONES.items() for dept in depts}
+    return pd.Series(departamentos).astype(str).map(mapa).fillna(MACROREGION_DEFECTO).to_numpy()
+
+
+def etiqueta_nodo(filas):
+    """Nombre legible de cada nodo: sus componentes distintos de 'Total' (o Perú para el total nacional)"""
+    partes = filas[_COLUMNAS_NODO].astype(str).where(lambda df: df != TOTAL, '')
+    return partes.agg(lambda fila: ' · '.join(p for p in fila if p) or 'Perú', axis=1)
+
+
+def construir_jerarquia(grupos):
+    """
+    Matriz de agregación de la jerarquía nacional / macrorregión / departamento / sexo.
+
+    grupos son las series base (Departamento, Sexo) en el orden de las filas de
+    las matrices que se agregarán. S (nodos × series base) tiene un 1 donde la
+    serie base suma en el nodo; P = (S'Λ⁻¹S)⁻¹ S'Λ⁻¹ es la proyección de la
+    reconciliación por mínimos cuadrados ponderados con escalado estructural,
+    Λ = diag(S·1): el peso de cada nodo es el inverso del número de series base
+    que suma, así que los totales grandes no arrastran a las series pequeñas.
+    Ambas se calculan una sola vez.
+    """
+    base = pd.DataFrame({
+        'Macrorregion': macrorregion(grupos['Departamento']),
+        'Departamento': grupos['Departamento'].astype(str).to_numpy(),
+        'Sexo': grupos['Sexo'].astype(str).to_numpy()
+    })
+
+    nodos, bloques = [], []
+    for nivel, columnas in NIVELES:
+        if columnas:
+            codigos = base.groupby(columnas, sort=True).ngroup().to_numpy()
+            nodos_nivel = base[columnas].drop_duplicates().sort_values(columnas)
+        else:
+            codigos = np.zeros(len(base), dtype=int)
+            nodos_nivel = pd.DataFrame(index=[0])
+        nodos_nivel = nodos_nivel.reindex(columns=_COLUMNAS_NODO, fill_value=TOTAL).reset_index(drop=True)
+        nodos_nivel.insert(0, 'Nivel', nivel)
+        nodos.append(nodos_nivel)
+        bloques.append((codigos[np.newaxis, :] == np.arange(len(nodos_nivel))[:, np.newaxis]).astype(float))
+
+    S = np.vstack(bloques)
+    pesos = 1 / S.sum(axis=1)  # Diagonal de Λ⁻¹
+    return {
+        'nodos': pd.concat(nodos, ignore_index=True),
+        'S': S,
+        'pesos': pesos,
+        'P': _proyeccion(S, pesos)
+    }
+
+
+def _proyeccion(S, pesos):
+    """P = (S'Λ⁻¹S)⁻¹ S'Λ⁻¹ para las columnas (series base) de S"""
+    S_ponderada = S.T * pesos
+    return np.linalg.solve(S_ponderada @ S, S_ponderada)
+
+
+def agregar(jerarquia, Y_base):
+    """Totales de todos los nodos a partir de las series base (series × años); NaN cuenta como 0"""
+    return jerarquia['S'] @ np.nan_to_num(Y_base)
+
+
+def reconciliar(jerarquia, Y_nodos):
+    """
+    Reconciliación por mínimos cuadrados ponderados de pronósticos hechos en cada nodo.
+
+    Y_nodos (nodos × años) no tiene por qué sumar; el resultado S P Y_nodos sí:
+    cada total es exactamente la suma de sus series base. Son conteos de casos,
+    así que los pronósticos negativos se llevan a 0 antes de proyectar, y en los
+    años en que alguna serie base reconciliada queda negativa esas series se
+    fijan en 0 y se vuelve a proyectar con las demás, hasta que ninguna lo sea.
+    """
+    S, pesos = jerarquia['S'], jerarquia['pesos']
+    Y_nodos = np.maximum(Y_nodos, 0)
+    base = jerarquia['P'] @ Y_nodos
+
+    for j in np.flatnonzero((base < 0).any(axis=0)):
+        libres = np.ones(S.shape[1], dtype=bool)
+        columna = base[:, j]
+        while (negativas := libres & (columna < 0)).any():
+            libres &= ~negativas
+            columna = np.zeros(S.shape[1])
+            if libres.any():
+                columna[libres] = _proyeccion(S[:, libres], pesos) @ Y_nodos[:, j]
+        base[:, j] = columna
+
+    return S @ base
+
+
+def _tabla_larga(jerarquia, años, **matrices):
+    """Aplana matrices (nodos × años) a filas Nivel, Macrorregion, Departamento, Sexo, Anio, ..."""
+    nodos = jerarquia['nodos']
+    n_años = len(años)
+    tabla = nodos.loc[nodos.index.repeat(n_años)].reset_index(drop=True)
+    tabla['Anio'] = np.tile(np.asarray(años, dtype=int), len(nodos))
+    for nombre, matriz in matrices.items():
+        tabla[nombre] = np.asarray(matriz, dtype=float).ravel()
+    return tabla
+
+
+def totales_jerarquicos(df_pred):
+    """Casos predichos y alertas de df_pred sumados en todos los niveles de la jerarquía"""
+    tabla = df_pred.astype({'Departamento': str, 'Sexo': str}).pivot_table(
+        index=['Departamento', 'Sexo'], columns='Anio',
+        values=['CasosEstimados_Predichos', 'Alerta'], aggfunc='sum', observed=True
+    )
+    grupos = tabla.index.to_frame(index=False)
+    jerarquia = construir_jerarquia(grupos)
+    años = tabla['CasosEstimados_Predichos'].columns
+    return _tabla_larga(
+        jerarquia, años,
+        Casos=agregar(jerarquia, tabla['CasosEstimados_Predichos'].to_numpy(dtype=float)),
+        Alertas=agregar(jerarquia, tabla['Alerta'].to_numpy(dtype=float))
+    )
+
+
+def pronosticar_jerarquico(historico='DATASET_VIH.csv', años_pred=AÑOS_PRED, metodo='log_lineal'):
+    """
+    Pronóstico de tendencia reconciliado en todos los niveles.
+
+    Agrega el histórico de las series base a todos los nodos, pronostica cada
+    nodo con el método elegido (todas las series en bloque) y reconcilia por
+    mínimos cuadrados. Devuelve el pronóstico base (Base) y el reconciliado
+    (Reconciliado) por nodo y año.
+    """
+    if isinstance(historico, pd.DataFrame):
+        df_hist = aplicar_esquema_historico(historico)
+    else:
+        df_hist = leer_tabla(historico, esquema=aplicar_esquema_historico)
+
+    promedios = calcular_promedios(df_hist)
+    Y, años = matriz_series(df_hist, promedios)
+    jerarquia = construir_jerarquia(promedios)
+
+    # Los nodos agregados cuentan como observados solo si todas sus series base lo están
+    faltantes = jerarquia['S'] @ np.isnan(Y) > 0
+    Y_nodos = np.where(faltantes, np.nan, agregar(jerarquia, Y))
+    base = METODOS[metodo](Y_nodos, años, años_pred)
+    reconciliado = reconciliar(jerarquia, base)
+    if (reconciliado < 0).any():
+        raise ValueError("La reconciliación produjo casos negativos")
+    return _tabla_larga(jerarquia, años_pred, Base=base, Reconciliado=reconciliado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pronósticos reconciliados por nivel (nacional, macrorregión, departamento)")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV de datos históricos")
+    parser.add_argument('--metodo', choices=sorted(METODOS), default='log_lineal')
+    parser.add_argument('--años', type=int, nargs='+', default=AÑOS_PRED, help="Años a predecir")
+    parser.add_argument('--salida', default='pronostico_jerarquico.csv')
+    args = parser.parse_args()
+
+    resultado = pronosticar_jerarquico(args.historico, args.años, args.metodo)
+    resultado.to_csv(args.salida, index=False)
+
+    print(f"✅ {resultado[['Nivel', 'Macrorregion', 'Departamento', 'Sexo']].drop_duplicates().shape[0]} nodos pronosticados")
+    nacional = resultado[resultado['Nivel'] == 'Nacional'].set_index('Anio')[['Base', 'Reconciliado']]
+    print("\n🇵🇪 Total nacional (pronóstico base y reconciliado):")
+    print(nacional.round(1).to_string())
+    print(f"\n📁 Resultado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import math
+import threading
+
+import pandas as pd
+
+from estadisticas_en_linea import EstadisticasPorGrupo, leer_por_lotes
+from generar_predicciones_variables import MULTIPLICADOR_ALERTA
+
+
+class MotorAlertas:
+    """
+    Motor de alertas en línea por (departamento, sexo).
+
+    Guarda en memoria el conteo, la media y la suma de cuadrados centrada (M2)
+    de cada grupo. Cada reporte nuevo se compara con el umbral vigente
+    (promedio + k * desviación estándar, la misma regla del generador) y luego
+    se incorpora a las estadísticas con la actualización de Welford, así que
+    procesar un reporte cuesta O(1) y nunca se recalcula el historial.
+    Solo se emiten los cambios de estado de alerta de cada grupo.
+    """
+
+    def __init__(self, estados=None, multiplicador=MULTIPLICADOR_ALERTA, min_observaciones=2):
+        self.multiplicador = multiplicador
+        self.min_observaciones = max(2, min_observaciones)
+        self._estados = {_clave(*clave): [float(v) for v in valores] for clave, valores in (estados or {}).items()}
+        self._alertas = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_historico(cls, fuente, **kwargs):
+        """Inicializa el motor recorriendo por lotes el historial (ruta o iterable de lotes)"""
+        estadisticas = EstadisticasPorGrupo()
+        for lote in leer_por_lotes(fuente):
+            estadisticas.agregar_lote(lote)
+        return cls(estadisticas.estados(), **kwargs)
+
+    def registrar(self, departamento, sexo, casos, anio=None):
+        """
+        Procesa un reporte de casos y devuelve el cambio de estado de alerta del
+        grupo (un diccionario) o None si el estado no cambió.
+        """
+        clave = _clave(departamento, sexo)
+        casos = float(casos)
+        with self._lock:
+            estado = self._estados.setdefault(clave, [0.0, 0.0, 0.0])
+            n, media, m2 = estado
+
+            # Evaluar contra la línea base anterior al reporte
+            umbral = self._umbral(n, media, m2)
+            alerta = casos > umbral
+
+            # Actualización de Welford
+            n += 1
+            delta = casos - media
+            media += delta / n
+            m2 += delta * (casos - media)
+            estado[:] = n, media, m2
+
+            anterior = self._alertas.get(clave, False)
+            self._alertas[clave] = alerta
+
+        if alerta == anterior:
+            return None
+        return {
+            'Departamento': clave[0],
+            'Sexo': clave[1],
+            'Anio': anio,
+            'Casos': casos,
+            'Umbral': round(umbral, 1),
+            'Alerta': alerta
+        }
+
+    def procesar_lote(self, reportes):
+        """
+        Procesa un micro-lote (DataFrame con Departamento, Sexo, CasosEstimados y
+        opcionalmente Anio) en orden y devuelve los cambios de estado como DataFrame.
+        """
+        anios = reportes['Anio'] if 'Anio' in reportes.columns else [None] * len(reportes)
+        cambios = [
+            cambio
+            for departamento, sexo, casos, anio in zip(
+                reportes['Departamento'], reportes['Sexo'], reportes['CasosEstimados'], anios
+            )
+            if pd.notna(casos)
+            for cambio in [self.registrar(departamento, sexo, casos, anio)]
+            if cambio is not None
+        ]
+        return pd.DataFrame(cambios, columns=['Departamento', 'Sexo', 'Anio', 'Casos', 'Umbral', 'Alerta'])
+
+    def estado(self, departamento, sexo):
+        """PromHist, StdHist, umbral y alerta vigentes de un grupo"""
+        clave = _clave(departamento, sexo)
+        with self._lock:
+            n, media, m2 = self._estados.get(clave, (0.0, 0.0, 0.0))
+            alerta = self._alertas.get(clave, False)
+        return {
+            'PromHist': media if n else math.nan,
+            'StdHist': math.sqrt(m2 / (n - 1)) if n > 1 else math.nan,
+            'Umbral': self._umbral(n, media, m2),
+            'Observaciones': int(n),
+            'Alerta': alerta
+        }
+
+    def resumen(self):
+        """Estado vigente de todos los grupos como DataFrame"""
+        with self._lock:
+            claves = sorted(self._estados)
+        return pd.DataFrame([
+            {'Departamento': dept, 'Sexo': sexo, **self.estado(dept, sexo)} for dept, sexo in claves
+        ])
+
+    def _umbral(self, n, media, m2):
+        if n < self.min_observaciones:
+            return math.inf  # Sin línea base suficiente no se alerta
+        return media + self.multiplicador * math.sqrt(m2 / (n - 1))
+
+
+def _clave(departamento, sexo):
+    """Clave de grupo como texto, para que categorías, enteros y cadenas coincidan"""
+    return str(departamento), str(sexo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de alertas en línea para reportes de casos de VIH")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="Historial con el que se inicializa el motor")
+    parser.add_argument('--reportes', required=True,
+                        help="CSV de reportes nuevos (Departamento, Sexo, CasosEstimados y opcionalmente Anio)")
+    parser.add_argument('--lote', type=int, default=1_000, help="Reportes por micro-lote")
+    args = parser.parse_args()
+
+    motor = MotorAlertas.desde_historico(args.historico)
+    print(f"🧠 Motor inicializado con {len(motor.resumen())} grupos")
+
+    for reportes in pd.read_csv(args.reportes, chunksize=args.lote):
+        for cambio in motor.procesar_lote(reportes).itertuples(index=False):
+            icono = "🚨 ALERTA" if cambio.Alerta else "✅ Normal"
+            print(f"{icono}: {cambio.Departamento} - {cambio.Sexo} ({cambio.Anio}): "
+                  f"{cambio.Casos:.0f} casos, umbral {cambio.Umbral}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Niveles de riesgo del README según la variación de la predicción frente al promedio histórico
+NIVELES_RIESGO = ['Bajo', 'Moderado', 'Alto']
+LIMITES_VARIACION = [5.0, 15.0]  # Bajo < 5 % <= Moderado <= 15 % < Alto
+
+COLORES_RIESGO = {'Bajo': '#2ca02c', 'Moderado': '#ffbf00', 'Alto': '#d62728'}
+
+
+def calcular_niveles(df_pred):
+    """
+    Variación porcentual frente a PromHist y nivel de riesgo de todas las filas.
+
+    Se calcula en una sola pasada vectorizada sobre la tabla completa de
+    predicciones. Las variaciones negativas cuentan como riesgo bajo; sin
+    promedio histórico (PromHist = 0) la variación queda vacía y cualquier caso
+    predicho es riesgo alto.
+    """
+    casos = df_pred['CasosEstimados_Predichos'].to_numpy(dtype='float64')
+    prom_hist = df_pred['PromHist'].to_numpy(dtype='float64')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacion = np.where(prom_hist > 0, (casos - prom_hist) / prom_hist * 100, np.nan)
+
+    # 0 = Bajo, 1 = Moderado, 2 = Alto; el 15 % todavía es moderado
+    posicion = (variacion >= LIMITES_VARIACION[0]).astype('int8') + (variacion > LIMITES_VARIACION[1])
+    posicion[np.isnan(variacion)] = np.where(casos[np.isnan(variacion)] > 0, 2, 0)
+
+    return pd.DataFrame({
+        'Anio': df_pred['Anio'].astype(int).to_numpy(),
+        'Departamento': df_pred['Departamento'].astype(str).to_numpy(),
+        'Sexo': df_pred['Sexo'].astype(str).to_numpy(),
+        'CasosEstimados_Predichos': casos.astype('int64'),
+        'PromHist': prom_hist,
+        'VariacionPct': variacion,
+        'NivelRiesgo': pd.Categorical.from_codes(posicion, NIVELES_RIESGO, ordered=True),
+        'Alerta': df_pred['Alerta'].astype(bool).to_numpy()
+    })
+
+
+def resumen_niveles(niveles):
+    """Cantidad de combinaciones departamento × sexo por año y nivel de riesgo"""
+    return pd.crosstab(niveles['Anio'], niveles['NivelRiesgo']).reindex(columns=NIVELES_RIESGO, fill_value=0)
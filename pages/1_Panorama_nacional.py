@@ -0,0 +1,88 @@
+import streamlit as st
+import altair as alt
+from datos_dashboard import instantanea_sesion
+from niveles_riesgo import COLORES_RIESGO, NIVELES_RIESGO, resumen_niveles
+
+# Misma fuente y versión de los datos que el dashboard principal; los niveles
+# se calculan una vez por versión en el hilo de refresco
+niveles = instantanea_sesion()['niveles']
+if niveles is None:
+    st.error("❌ No se pudieron cargar los datos.")
+    st.stop()
+
+# Configuración de la página
+st.set_page_config(
+    page_title="Panorama nacional - Alerta VIH Perú",
+    layout="wide",
+    page_icon="🗺️"
+)
+
+st.markdown(
+    """
+    # 🗺️ Panorama Nacional de Riesgo
+    Nivel de riesgo de **todos los departamentos y años de predicción**, separado por sexo.
+    El nivel compara los casos predichos con el promedio histórico
+    (🟢 **Bajo** < 5 %, 🟡 **Moderado** 5–15 %, 🔴 **Alto** > 15 %); 🚨 marca las celdas con alerta.
+    """
+)
+
+# --- Filtros ---
+solo_alertas = st.sidebar.checkbox("Solo departamentos con alguna alerta", value=False, key="solo_alertas")
+datos = niveles
+if solo_alertas:
+    con_alerta = niveles.loc[niveles['Alerta'], 'Departamento'].unique()
+    datos = niveles[niveles['Departamento'].isin(con_alerta)]
+
+if datos.empty:
+    st.info("No hay departamentos con alertas en las predicciones.")
+    st.stop()
+
+# --- Mapa de calor por sexo ---
+escala = alt.Scale(domain=NIVELES_RIESGO, range=[COLORES_RIESGO[n] for n in NIVELES_RIESGO])
+
+def mapa_calor(datos_sexo):
+    """Departamento × año coloreado por nivel de riesgo, con las alertas marcadas"""
+    base = alt.Chart(datos_sexo).encode(
+        x=alt.X('Anio:O', title='Año'),
+        y=alt.Y('Departamento:N', title='', sort='ascending')
+    )
+    celdas = base.mark_rect(stroke='white').encode(
+        color=alt.Color('NivelRiesgo:N', scale=escala, title='Nivel de riesgo'),
+        tooltip=[
+            alt.Tooltip('Departamento:N'),
+            alt.Tooltip('Sexo:N'),
+            alt.Tooltip('Anio:O', title='Año'),
+            alt.Tooltip('CasosEstimados_Predichos:Q', title='Casos predichos'),
+            alt.Tooltip('PromHist:Q', title='Promedio histórico', format='.1f'),
+            alt.Tooltip('VariacionPct:Q', title='Variación (%)', format='+.1f'),
+            alt.Tooltip('NivelRiesgo:N', title='Nivel'),
+            alt.Tooltip('Alerta:N')
+        ]
+    )
+    alertas = base.transform_filter(alt.datum.Alerta).mark_text(text='🚨', size=12)
+    return (celdas + alertas).properties(height=max(200, 18 * datos_sexo['Departamento'].nunique()))
+
+columnas = st.columns(datos['Sexo'].nunique())
+for columna, (sexo, datos_sexo) in zip(columnas, datos.groupby('Sexo', sort=True)):
+    with columna:
+        st.subheader(sexo)
+        st.altair_chart(mapa_calor(datos_sexo), use_container_width=True)
+
+# --- Resumen ---
+st.markdown("---")
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("Combinaciones por nivel y año")
+    st.dataframe(resumen_niveles(datos), use_container_width=True)
+
+with col2:
+    st.subheader("Riesgo alto con alerta")
+    criticos = datos[(datos['NivelRiesgo'] == 'Alto') & datos['Alerta']]
+    if criticos.empty:
+        st.success("✅ Ninguna combinación con riesgo alto y alerta.")
+    else:
+        tabla = criticos.sort_values('VariacionPct', ascending=False)[
+            ['Departamento', 'Sexo', 'Anio', 'CasosEstimados_Predichos', 'VariacionPct']
+        ].rename(columns={'Anio': 'Año', 'CasosEstimados_Predichos': 'Casos predichos', 'VariacionPct': 'Variación (%)'})
+        st.dataframe(tabla.round(1), use_container_width=True, hide_index=True)
@@ -0,0 +1,104 @@
+import streamlit as st
+import altair as alt
+import numpy as np
+from datos_dashboard import instantanea_sesion
+from sensibilidad_umbral import MULTIPLICADOR_ACTUAL, REGLAS
+
+# Misma fuente y versión de los datos que el dashboard principal; la grilla
+# completa de reglas y multiplicadores se calcula una vez por versión
+sensibilidad = instantanea_sesion()['sensibilidad']
+if sensibilidad is None:
+    st.info("ℹ️ El análisis de sensibilidad necesita el histórico (DATASET_VIH.csv) con años suficientes "
+            "para el backtesting, y la fuente de datos actual no lo incluye.")
+    st.stop()
+
+# Configuración de la página
+st.set_page_config(
+    page_title="Sensibilidad del umbral - Alerta VIH Perú",
+    layout="wide",
+    page_icon="📏"
+)
+
+st.markdown(
+    """
+    # 📏 Sensibilidad del Umbral de Alerta
+    Cuántas alertas y grupos se marcan con cada regla y multiplicador, y qué tan bien
+    acertaron esas alertas en el **backtesting** sobre el histórico 2015-2024.
+    """
+)
+
+# --- Filtros ---
+nombres_regla = {
+    'desviacion': "Promedio + k × desviación estándar",
+    'proporcional': "k × promedio histórico"
+}
+regla = st.sidebar.radio(
+    "Regla de alerta",
+    options=REGLAS,
+    format_func=nombres_regla.get,
+    key="regla_selector"
+)
+curva = sensibilidad[sensibilidad['Regla'] == regla]
+multiplicadores = curva['Multiplicador'].tolist()
+actual = MULTIPLICADOR_ACTUAL[regla]
+k = st.sidebar.select_slider(
+    "Multiplicador k",
+    options=multiplicadores,
+    value=multiplicadores[int(np.argmin(np.abs(np.asarray(multiplicadores) - actual)))],
+    key=f"multiplicador_{regla}"  # Cada regla conserva su propio multiplicador
+)
+fila = curva[curva['Multiplicador'] == k].iloc[0]
+fila_actual = curva.iloc[int(np.argmin(np.abs(curva['Multiplicador'].to_numpy() - actual)))]
+
+# --- Métricas del multiplicador elegido ---
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("🚨 Alertas", int(fila['Alertas']), delta=int(fila['Alertas'] - fila_actual['Alertas']),
+              delta_color="off")
+with col2:
+    st.metric("🏛️ Grupos con alerta", int(fila['GruposConAlerta']),
+              delta=int(fila['GruposConAlerta'] - fila_actual['GruposConAlerta']), delta_color="off")
+with col3:
+    st.metric("🎯 Precisión (backtesting)", f"{fila['Precision']:.0%}" if np.isfinite(fila['Precision']) else "—")
+with col4:
+    st.metric("🔎 Exhaustividad (backtesting)",
+              f"{fila['Exhaustividad']:.0%}" if np.isfinite(fila['Exhaustividad']) else "—")
+st.caption(f"Diferencias frente al multiplicador actual (k = {actual}).")
+
+# --- Curvas ---
+def curva_sensibilidad(columnas, titulo):
+    """Curva de varias columnas de la grilla frente a k, con el k elegido y el actual marcados"""
+    datos = curva.melt(id_vars='Multiplicador', value_vars=list(columnas), var_name='Medida', value_name='Valor')
+    datos['Medida'] = datos['Medida'].map(columnas)
+    lineas = alt.Chart(datos).mark_line(point=True).encode(
+        x=alt.X('Multiplicador:Q', title='Multiplicador k'),
+        y=alt.Y('Valor:Q', title=titulo),
+        color=alt.Color('Medida:N', title=''),
+        tooltip=['Multiplicador:Q', 'Medida:N', alt.Tooltip('Valor:Q', format='.2f')]
+    )
+    marcas = alt.Chart(
+        {'values': [{'k': k, 'Marca': 'Elegido'}, {'k': actual, 'Marca': 'Actual'}]}
+    ).mark_rule(strokeDash=[4, 4]).encode(
+        x='k:Q',
+        color=alt.Color('Marca:N', scale=alt.Scale(domain=['Elegido', 'Actual'], range=['#d62728', '#7f7f7f']),
+                        legend=None),
+        tooltip=['Marca:N', 'k:Q']
+    )
+    return (lineas + marcas).resolve_scale(color='independent').properties(height=320)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Alertas en las predicciones")
+    st.altair_chart(
+        curva_sensibilidad({'Alertas': 'Alertas', 'GruposConAlerta': 'Grupos con alerta'}, 'Cantidad'),
+        use_container_width=True
+    )
+with col2:
+    st.subheader("Acierto en el backtesting")
+    st.altair_chart(
+        curva_sensibilidad({'Precision': 'Precisión', 'Exhaustividad': 'Exhaustividad'}, 'Proporción'),
+        use_container_width=True
+    )
+
+with st.expander("Ver la grilla completa"):
+    st.dataframe(curva.round(3), use_container_width=True, hide_index=True)
@@ -0,0 +1,67 @@
+import streamlit as st
+import altair as alt
+import pandas as pd
+from datos_dashboard import instantanea_sesion
+from jerarquia import NIVELES
+
+# Misma fuente y versión de los datos que el dashboard principal; los totales de
+# todos los niveles y el pronóstico reconciliado se calculan una vez por versión
+niveles = instantanea_sesion()['totales_nivel']
+if niveles is None:
+    st.error("❌ No se pudieron cargar los datos.")
+    st.stop()
+hay_pronostico = niveles['Reconciliado'].notna().any()
+
+# Configuración de la página
+st.set_page_config(
+    page_title="Totales por nivel - Alerta VIH Perú",
+    layout="wide",
+    page_icon="🧮"
+)
+
+st.markdown(
+    """
+    # 🧮 Totales por Nivel
+    Casos predichos sumados a nivel **nacional, macrorregional y departamental** (con y sin
+    distinción de sexo), junto al pronóstico de tendencia **reconciliado**: en todos los
+    niveles los totales coinciden con la suma de sus departamentos.
+    """
+)
+
+# --- Filtros ---
+nivel = st.sidebar.selectbox("Nivel", options=[n for n, _ in NIVELES], index=0, key="nivel_selector")
+datos_nivel = niveles[niveles['Nivel'] == nivel]
+nodo = st.sidebar.selectbox("Elemento", options=sorted(datos_nivel['Nodo'].unique()), index=0,
+                            key=f"nodo_{nivel}")
+datos_nodo = datos_nivel[datos_nivel['Nodo'] == nodo].sort_values('Anio')
+
+# --- Métricas ---
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("📊 Casos predichos (todos los años)", f"{int(datos_nodo['Casos'].sum()):,}")
+with col2:
+    st.metric("🚨 Alertas", int(datos_nodo['Alertas'].sum()))
+with col3:
+    st.metric("📈 Tendencia reconciliada (todos los años)",
+              f"{datos_nodo['Reconciliado'].sum():,.0f}" if hay_pronostico else "—")
+if not hay_pronostico:
+    st.caption("La tendencia reconciliada necesita el histórico (DATASET_VIH.csv), que la fuente de datos actual no incluye.")
+
+# --- Evolución del elemento seleccionado ---
+st.subheader(f"Evolución: {nodo}")
+evolucion = datos_nodo.melt(
+    id_vars='Anio', value_vars=['Casos', 'Reconciliado'], var_name='Serie', value_name='Valor'
+)
+evolucion['Serie'] = evolucion['Serie'].map({'Casos': 'Predicción', 'Reconciliado': 'Tendencia reconciliada'})
+grafico = alt.Chart(evolucion).mark_line(point=True).encode(
+    x=alt.X('Anio:O', title='Año'),
+    y=alt.Y('Valor:Q', title='Número de Casos'),
+    color=alt.Color('Serie:N', title=''),
+    tooltip=[alt.Tooltip('Anio:O', title='Año'), 'Serie:N', alt.Tooltip('Valor:Q', format=',.0f')]
+).properties(height=360)
+st.altair_chart(grafico, use_container_width=True)
+
+# --- Tabla del nivel ---
+st.subheader(f"Casos predichos por año — {nivel}")
+tabla = pd.pivot_table(datos_nivel, index='Nodo', columns='Anio', values='Casos', aggfunc='sum')
+st.dataframe(tabla.astype(int), use_container_width=True)
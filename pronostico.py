@@ -0,0 +1,178 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import guardar_tabla, leer_tabla
+from esquema import aplicar_esquema_historico
+from generar_predicciones_variables import (
+    AÑOS_PRED, MULTIPLICADOR_ALERTA, armar_predicciones, calcular_promedios, mostrar_resumen
+)
+
+# Parámetros de la tendencia amortiguada (Holt con amortiguamiento)
+ALFA = 0.5   # Suavizado del nivel
+BETA = 0.2   # Suavizado de la tendencia
+PHI = 0.9    # Amortiguamiento de la tendencia hacia el futuro
+
+# Iteraciones de mínimos cuadrados reponderados del ajuste de Poisson
+ITERACIONES_POISSON = 25
+
+# Penalización mínima sobre la pendiente: con menos de dos años observados la
+# pendiente queda en cero y la predicción es el promedio del grupo
+_RIDGE_PENDIENTE = 1e-6
+
+
+def matriz_series(df_hist, promedios=None):
+    """
+    Casos históricos como matriz (grupos × años), alineada con las filas de promedios.
+
+    Los años sin dato quedan en NaN. Devuelve la matriz y los años de sus columnas.
+    """
+    if promedios is None:
+        promedios = calcular_promedios(df_hist)
+    tabla = (
+        df_hist.groupby(['Departamento', 'Sexo', 'Anio'], observed=True)['CasosEstimados'].sum()
+        .unstack('Anio')
+        .reindex(pd.MultiIndex.from_frame(promedios[['Departamento', 'Sexo']].astype(str)))
+    )
+    return tabla.to_numpy(dtype=float), tabla.columns.to_numpy(dtype=int)
+
+
+def _resolver_en_bloque(X, pesos, y):
+    """
+    Mínimos cuadrados ponderados de todas las series a la vez.
+
+    X es (años × 2), pesos e y son (grupos × años). Arma las ecuaciones normales
+    (grupos × 2 × 2) con einsum y las resuelve en una sola llamada.
+    """
+    XtWX = np.einsum('ta,gt,tb->gab', X, pesos, X)
+    XtWX[:, 1, 1] += _RIDGE_PENDIENTE
+    XtWy = np.einsum('ta,gt,gt->ga', X, pesos, y)
+    return np.linalg.solve(XtWX, XtWy[..., np.newaxis])[..., 0]
+
+
+def _diseño(años, centro):
+    años = np.asarray(años, dtype=float)
+    return np.column_stack([np.ones_like(años), años - centro])
+
+
+def pronostico_log_lineal(Y, años, años_pred):
+    """Tendencia lineal sobre log(1 + casos) ajustada por mínimos cuadrados"""
+    observado = ~np.isnan(Y)
+    centro = np.mean(años)
+    coef = _resolver_en_bloque(_diseño(años, centro), observado.astype(float), np.log1p(np.where(observado, Y, 0)))
+    return np.expm1(coef @ _diseño(años_pred, centro).T)
+
+
+def pronostico_poisson(Y, años, años_pred, iteraciones=ITERACIONES_POISSON):
+    """Regresión de Poisson con tendencia log-lineal (IRLS en bloque sobre todas las series)"""
+    observado = ~np.isnan(Y)
+    y = np.where(observado, Y, 0)
+    centro = np.mean(años)
+    X = _diseño(años, centro)
+
+    # Arranque desde el ajuste log-lineal
+    coef = _resolver_en_bloque(X, observado.astype(float), np.log1p(y))
+    for _ in range(iteraciones):
+        eta = np.clip(coef @ X.T, -20, 20)
+        mu = np.exp(eta)
+        z = eta + (y - mu) / mu
+        coef = _resolver_en_bloque(X, observado * mu, z)
+
+    return np.exp(np.clip(coef @ _diseño(años_pred, centro).T, -20, 20))
+
+
+def pronostico_tendencia_amortiguada(Y, años, años_pred, alfa=ALFA, beta=BETA, phi=PHI):
+    """
+    Suavizado exponencial de Holt con tendencia amortiguada.
+
+    Recorre los años (pocos) y actualiza todas las series a la vez; los años sin
+    dato solo proyectan el nivel y la tendencia.
+    """
+    n_grupos, n_años = Y.shape
+    observado = ~np.isnan(Y)
+
+    # Nivel inicial: primer valor observado; tendencia inicial: diferencia media observada
+    primero = np.argmax(observado, axis=1)
+    nivel = np.where(observado.any(axis=1), Y[np.arange(n_grupos), primero], 0.0)
+    diferencias = np.diff(Y, axis=1)
+    hay_diferencia = ~np.isnan(diferencias)
+    tendencia = np.where(
+        hay_diferencia.any(axis=1),
+        np.nansum(diferencias, axis=1) / np.maximum(hay_diferencia.sum(axis=1), 1),
+        0.0
+    )
+
+    for t in range(n_años):
+        previsto = nivel + phi * tendencia
+        y_t = Y[:, t]
+        nuevo_nivel = np.where(observado[:, t], alfa * np.nan_to_num(y_t) + (1 - alfa) * previsto, previsto)
+        tendencia = np.where(
+            observado[:, t], beta * (nuevo_nivel - nivel) + (1 - beta) * phi * tendencia, phi * tendencia
+        )
+        nivel = nuevo_nivel
+
+    # Suma de phi + phi^2 + ... + phi^h para cada horizonte
+    horizontes = np.asarray(años_pred, dtype=int) - int(años[-1])
+    amortiguado = np.array([np.sum(phi ** np.arange(1, h + 1)) for h in horizontes])
+    return nivel[:, np.newaxis] + tendencia[:, np.newaxis] * amortiguado[np.newaxis, :]
+
+
+METODOS = {
+    'log_lineal': pronostico_log_lineal,
+    'poisson': pronostico_poisson,
+    'tendencia_amortiguada': pronostico_tendencia_amortiguada
+}
+
+
+def pronosticar(historico='DATASET_VIH.csv', años_pred=AÑOS_PRED, metodo='log_lineal', salida=None,
+                multiplicador_alerta=MULTIPLICADOR_ALERTA):
+    """
+    Predicciones a partir de la tendencia 2015-2024 de cada departamento y sexo.
+
+    Ajusta todas las series a la vez con el método elegido (ver METODOS) y
+    devuelve el mismo esquema que generar_predicciones: la alerta se activa si
+    la predicción supera PromHist + multiplicador_alerta × StdHist.
+    historico puede ser la ruta del CSV o un DataFrame ya cargado.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}. Opciones: {sorted(METODOS)}")
+
+    if isinstance(historico, pd.DataFrame):
+        df_hist = aplicar_esquema_historico(historico)
+    else:
+        df_hist = leer_tabla(historico, esquema=aplicar_esquema_historico)
+
+    promedios = calcular_promedios(df_hist)
+    Y, años = matriz_series(df_hist, promedios)
+    casos = METODOS[metodo](Y, años, años_pred)
+    casos_pred = np.round(np.maximum(np.nan_to_num(casos), 0)).astype(np.int64)
+
+    umbral_alerta = (promedios['PromHist'] + multiplicador_alerta * promedios['StdHist']).to_numpy(dtype=float)
+    alerta = casos_pred > umbral_alerta[:, np.newaxis]
+
+    df_predicciones = armar_predicciones(promedios, años_pred, casos_pred, alerta)
+    if salida:
+        guardar_tabla(df_predicciones, salida)
+    return df_predicciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pronóstico de casos de VIH a partir de la tendencia histórica")
+    parser.add_argument('--historico', default='DATASET_VIH.csv', help="CSV o Arrow de datos históricos")
+    parser.add_argument('--salida', default='predicciones_alerta_vih_2025_2030.csv',
+                        help="Archivo de salida (.csv, o .arrow para el formato columnar)")
+    parser.add_argument('--metodo', choices=sorted(METODOS), default='log_lineal')
+    parser.add_argument('--años', type=int, nargs='+', default=AÑOS_PRED, help="Años a predecir")
+    args = parser.parse_args()
+
+    print(f"Pronosticando con el método '{args.metodo}'...")
+    inicio = time.perf_counter()
+    df_predicciones = pronosticar(args.historico, args.años, args.metodo, args.salida)
+    print(f"⏱️ {time.perf_counter() - inicio:.3f} s")
+    mostrar_resumen(df_predicciones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+# Segundos entre revisiones de los archivos de datos
+INTERVALO = 5.0
+
+# Espera máxima entre reintentos mientras se sirven datos de respaldo
+INTERVALO_MAXIMO_RESPALDO = 300.0
+
+
+class RefrescoDatos:
+    """
+    Datos de un dashboard que se recargan solos cuando cambian sus archivos.
+
+    La primera carga se hace al crear el objeto. Después, un hilo de fondo revisa
+    cada `intervalo` segundos la huella (mtime y tamaño) de las rutas vigiladas y,
+    si cambió, vuelve a cargar y preparar los datos (índice, agregados, ...) fuera
+    del ciclo de las sesiones. La instantánea nueva reemplaza a la anterior con
+    una sola asignación, así que cada ejecución ve una versión completa y
+    consistente, sin esperar la recarga.
+
+    Si la carga tuvo que recurrir a datos de respaldo (p. ej. la descarga remota
+    falló en el arranque), no hay ningún archivo cuyo cambio esperar: mientras
+    dure el respaldo se vuelve a cargar con una espera que se duplica en cada
+    intento fallido, hasta intervalo_maximo.
+    """
+
+    def __init__(self, cargar, rutas, preparar=None, intervalo=INTERVALO, al_revisar=None,
+                 es_respaldo=None, intervalo_maximo=INTERVALO_MAXIMO_RESPALDO):
+        """
+        cargar() devuelve los datos; preparar(datos), opcional, devuelve un
+        diccionario con los derivados que se agregan a la instantánea.
+        al_revisar(), opcional, se llama en cada revisión antes de comparar las
+        huellas (p. ej. para revalidar una descarga remota).
+        es_respaldo(datos), opcional, indica si los datos cargados son de
+        respaldo y hay que seguir reintentando la carga.
+        """
+        self.cargar = cargar
+        self.rutas = list(rutas)
+        self.preparar = preparar
+        self.intervalo = intervalo
+        self.al_revisar = al_revisar
+        self.es_respaldo = es_respaldo
+        self.intervalo_maximo = intervalo_maximo
+        self.ultimo_error = None
+        self._version = 0
+        self._espera_respaldo = intervalo
+        self._proximo_reintento = 0.0
+        self._detener = threading.Event()
+        self._hilo = None
+        self._actual = self._construir(self._huella())
+
+    def actual(self):
+        """Instantánea vigente: {'datos', 'version', 'huella', 'cargado', 'respaldo', ...derivados}"""
+        return self._actual
+
+    def iniciar(self):
+        """Arranca el hilo de revisión (una sola vez) y devuelve el propio objeto"""
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name='refresco-datos', daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+
+    def revisar(self):
+        """Recarga si cambió alguna ruta vigilada. Devuelve True si hubo una versión nueva"""
+        if self.al_revisar is not None:
+            self.al_revisar()
+        huella = self._huella()
+        if huella != self._actual['huella']:
+            # La huella se toma antes de cargar: si el archivo cambia durante la carga,
+            # la próxima revisión lo vuelve a detectar
+            self._actual = self._construir(huella)
+            return True
+        if self._actual['respaldo'] and time.monotonic() >= self._proximo_reintento:
+            return self._reintentar()
+        return False
+
+    def _reintentar(self):
+        """Vuelve a cargar mientras se sirven datos de respaldo; si siguen siéndolo se descartan"""
+        self._espera_respaldo = min(self._espera_respaldo * 2, self.intervalo_maximo)
+        self._proximo_reintento = time.monotonic() + self._espera_respaldo
+        datos = self.cargar()
+        if self.es_respaldo(datos):
+            return False
+        # La propia carga pudo crear archivos vigilados (p. ej. la copia descargada),
+        # así que aquí la huella se toma después
+        self._actual = self._construir(self._huella(), datos)
+        return True
+
+    def _construir(self, huella, datos=None):
+        if datos is None:
+            datos = self.cargar()
+        self._version += 1
+        instantanea = {
+            'datos': datos, 'version': self._version, 'huella': huella, 'cargado': time.time(),
+            'respaldo': self.es_respaldo is not None and bool(self.es_respaldo(datos))
+        }
+        if self.preparar is not None:
+            instantanea.update(self.preparar(datos))
+        # Cada versión nueva reinicia la espera entre reintentos
+        self._espera_respaldo = self.intervalo
+        self._proximo_reintento = time.monotonic() + self.intervalo
+        return instantanea
+
+    def _huella(self):
+        huella = []
+        for ruta in self.rutas:
+            try:
+                estado = os.stat(ruta)
+                huella.append((ruta, estado.st_mtime_ns, estado.st_size))
+            except FileNotFoundError:
+                huella.append((ruta, None, None))
+        return tuple(huella)
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.revisar()
+                self.ultimo_error = None
+            except Exception as e:
+                # Se conserva la versión anterior y se reintenta en la próxima revisión
+                self.ultimo_error = e
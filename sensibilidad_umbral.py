@@ -0,0 +1,144 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from backtesting import METODO_FACTORES, ejecutar_backtesting
+from esquema import aplicar_esquema_historico, aplicar_esquema_predicciones
+from generar_predicciones_variables import MULTIPLICADOR_ALERTA, calcular_promedios, generar_predicciones
+
+# Reglas de alerta: umbral = a × PromHist + b × StdHist según el multiplicador k
+#   desviacion:   PromHist + k × StdHist  (generar_predicciones)
+#   proporcional: k × PromHist            (datos de ejemplo de las apps, k = 1.2)
+REGLAS = ['desviacion', 'proporcional']
+
+# Multiplicadores evaluados por regla
+MULTIPLICADORES = {
+    'desviacion': np.round(np.arange(0.0, 3.0 + 1e-9, 0.05), 2),
+    'proporcional': np.round(np.arange(1.0, 2.0 + 1e-9, 0.02), 2)
+}
+
+# Multiplicador que usa hoy cada regla
+MULTIPLICADOR_ACTUAL = {'desviacion': MULTIPLICADOR_ALERTA, 'proporcional': 1.2}
+
+
+def grilla_umbrales(multiplicadores=None):
+    """Filas (regla, multiplicador) de la grilla con sus coeficientes a y b"""
+    multiplicadores = multiplicadores or MULTIPLICADORES
+    filas = []
+    for regla in REGLAS:
+        k = np.asarray(multiplicadores[regla], dtype=float)
+        filas.append(pd.DataFrame({
+            'Regla': regla,
+            'Multiplicador': k,
+            'a': k if regla == 'proporcional' else 1.0,
+            'b': k if regla == 'desviacion' else 0.0
+        }))
+    return pd.concat(filas, ignore_index=True)
+
+
+def _umbrales(grilla, prom_hist, std_hist):
+    """Umbral de cada combinación de la grilla para cada celda: matriz (combinaciones × celdas)"""
+    a = grilla['a'].to_numpy()[:, np.newaxis]
+    b = grilla['b'].to_numpy()[:, np.newaxis]
+    return a * np.asarray(prom_hist, dtype=float)[np.newaxis, :] + b * np.asarray(std_hist, dtype=float)[np.newaxis, :]
+
+
+def sensibilidad_alertas(df_pred, df_hist, grilla=None):
+    """
+    Alertas y grupos (departamento, sexo) marcados en las predicciones para toda la grilla.
+
+    Se evalúa en una sola pasada: la matriz de umbrales (combinaciones × celdas)
+    se compara por broadcasting con los casos predichos. StdHist sale del
+    histórico; no se cuentan los brotes simulados, que siempre alertan.
+    """
+    grilla = grilla_umbrales() if grilla is None else grilla
+    datos = df_pred[['Departamento', 'Sexo', 'CasosEstimados_Predichos', 'PromHist']].astype(
+        {'Departamento': str, 'Sexo': str}
+    ).merge(
+        calcular_promedios(df_hist)[['Departamento', 'Sexo', 'StdHist']].astype({'Departamento': str, 'Sexo': str}),
+        on=['Departamento', 'Sexo'], how='left'
+    ).sort_values(['Departamento', 'Sexo'], kind='stable')
+
+    casos = datos['CasosEstimados_Predichos'].to_numpy(dtype=float)
+    alertas = casos[np.newaxis, :] > _umbrales(grilla, datos['PromHist'], datos['StdHist'])
+
+    # Grupos con al menos una alerta: OR por tramos contiguos de cada grupo
+    departamentos, sexos = datos['Departamento'].to_numpy(), datos['Sexo'].to_numpy()
+    inicios = np.flatnonzero(np.r_[True, (departamentos[1:] != departamentos[:-1]) | (sexos[1:] != sexos[:-1])])
+    grupos_marcados = np.logical_or.reduceat(alertas, inicios, axis=1).sum(axis=1)
+
+    resultado = grilla[['Regla', 'Multiplicador']].copy()
+    resultado['Alertas'] = alertas.sum(axis=1)
+    resultado['PctCeldas'] = resultado['Alertas'] / max(len(datos), 1) * 100
+    resultado['GruposConAlerta'] = grupos_marcados
+    return resultado
+
+
+def sensibilidad_backtest(celdas, grilla=None):
+    """
+    Precisión y exhaustividad de las alertas en el backtesting para toda la grilla.
+
+    celdas viene de backtesting.ejecutar_backtesting (un solo método). Para cada
+    combinación la alerta predicha es Predicho > umbral y la real Real > umbral,
+    con el promedio y la desviación de la ventana de entrenamiento de cada celda.
+    """
+    grilla = grilla_umbrales() if grilla is None else grilla
+    umbrales = _umbrales(grilla, celdas['PromHist'], celdas['StdHist'])
+    predichas = celdas['Predicho'].to_numpy(dtype=float)[np.newaxis, :] > umbrales
+    reales = celdas['Real'].to_numpy(dtype=float)[np.newaxis, :] > umbrales
+
+    aciertos = (predichas & reales).sum(axis=1)
+    n_predichas, n_reales = predichas.sum(axis=1), reales.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(n_predichas > 0, aciertos / n_predichas, np.nan)
+        exhaustividad = np.where(n_reales > 0, aciertos / n_reales, np.nan)
+
+    resultado = grilla[['Regla', 'Multiplicador']].copy()
+    resultado['AlertasPredichas'] = n_predichas
+    resultado['AlertasReales'] = n_reales
+    resultado['Precision'] = precision
+    resultado['Exhaustividad'] = exhaustividad
+    return resultado
+
+
+def analizar_umbrales(df_pred, df_hist, metodo=METODO_FACTORES, grilla=None, procesos=1):
+    """Sensibilidad de alertas y backtesting del método indicado, en una tabla por combinación"""
+    grilla = grilla_umbrales() if grilla is None else grilla
+    celdas, _ = ejecutar_backtesting(df_hist, [metodo], procesos=procesos)
+    return sensibilidad_alertas(df_pred, df_hist, grilla).merge(
+        sensibilidad_backtest(celdas, grilla), on=['Regla', 'Multiplicador']
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensibilidad de las alertas al umbral (regla y multiplicador)")
+    parser.add_argument('--predicciones', default='predicciones_alerta_vih_2025_2030.csv')
+    parser.add_argument('--historico', default='DATASET_VIH.csv')
+    parser.add_argument('--metodo', default=METODO_FACTORES, help="Método del backtesting")
+    parser.add_argument('--salida', default='sensibilidad_umbral.csv', help="CSV con la grilla completa")
+    args = parser.parse_args()
+
+    df_hist = leer_tabla(args.historico, esquema=aplicar_esquema_historico)
+    try:
+        df_pred = leer_tabla(args.predicciones, esquema=aplicar_esquema_predicciones)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df_pred = generar_predicciones(df_hist)
+
+    inicio = time.perf_counter()
+    resultado = analizar_umbrales(df_pred, df_hist, args.metodo)
+    print(f"✅ {len(resultado)} combinaciones evaluadas en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    resultado.to_csv(args.salida, index=False)
+
+    for regla in REGLAS:
+        actual = resultado[(resultado['Regla'] == regla)
+                           & np.isclose(resultado['Multiplicador'], MULTIPLICADOR_ACTUAL[regla])]
+        print(f"\n📏 Regla '{regla}' (actual k = {MULTIPLICADOR_ACTUAL[regla]}):")
+        print(actual.round(3).to_string(index=False))
+    print(f"\n📁 Grilla completa en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from almacenamiento import leer_tabla
+from cache_lru import CacheLRU
+from cubo_agregados import TOTAL, construir_cubo, totales_por_año
+from esquema import aplicar_esquema_historico, aplicar_esquema_predicciones
+from generar_predicciones_variables import generar_predicciones
+from indice_datos import construir_indice, obtener_año, obtener_grupo
+
+RUTA_HISTORICO = 'DATASET_VIH.csv'
+RUTA_PREDICCIONES = 'predicciones_alerta_vih_2025_2030.csv'
+
+# Tamaño máximo de la cabecera de una petición
+_MAX_CABECERA = 16 * 1024
+
+_ESTADOS_HTTP = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'
+}
+
+
+class ErrorConsulta(Exception):
+    """Error de una consulta que se devuelve al cliente con su código HTTP"""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def cargar_datos(ruta_predicciones=RUTA_PREDICCIONES, ruta_historico=RUTA_HISTORICO):
+    """Misma carga que los dashboards: tablas tipadas y predicciones en memoria si falta el archivo"""
+    df_hist = leer_tabla(ruta_historico, esquema=aplicar_esquema_historico)
+    try:
+        df_pred = leer_tabla(ruta_predicciones, esquema=aplicar_esquema_predicciones)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df_pred = generar_predicciones(df_hist)
+    return df_pred, df_hist
+
+
+class ServicioConsultas:
+    """
+    Consultas de predicciones y alertas sin pasar por Streamlit.
+
+    Usa el mismo índice por (departamento, sexo, año) que los dashboards y guarda
+    las respuestas ya serializadas en una caché LRU cuya clave incluye la versión
+    de los datos.
+    """
+
+    def __init__(self, df_pred, df_hist=None, capacidad_cache=1024):
+        self.indice = construir_indice(df_pred, df_hist)
+        self.cubo = construir_cubo(df_pred)
+        self.cache = CacheLRU(capacidad_cache)
+        self._rutas = {
+            '/salud': self._salud,
+            '/opciones': self._opciones,
+            '/grupo': self._grupo,
+            '/anio': self._año,
+            '/alertas': self._alertas,
+            '/totales': self._totales
+        }
+
+    def responder(self, ruta, parametros):
+        """Cuerpo JSON (bytes) de la respuesta a una ruta con sus parámetros ya decodificados"""
+        manejador = self._rutas.get(ruta)
+        if manejador is None:
+            raise ErrorConsulta(f"Ruta desconocida: {ruta}", 404)
+        clave = (ruta, tuple(sorted(parametros.items())), self.indice['version'])
+        return self.cache.obtener(clave, lambda: _a_json(manejador(parametros)))
+
+    # --- Consultas ---
+
+    def _salud(self, parametros):
+        return {
+            'version': self.indice['version'],
+            'filas_prediccion': len(self.indice['pred']['datos']),
+            'filas_historico': len(self.indice['hist']['datos'])
+        }
+
+    def _opciones(self, parametros):
+        datos = self.indice['pred']['datos']
+        return {
+            'anios': sorted(datos['Anio'].unique().tolist()),
+            'departamentos': sorted(datos['Departamento'].unique().tolist()),
+            'sexos': sorted(datos['Sexo'].unique().tolist())
+        }
+
+    def _grupo(self, parametros):
+        departamento, sexo = _requerido(parametros, 'departamento'), _requerido(parametros, 'sexo')
+        return {
+            'prediccion': _registros(obtener_grupo(self.indice, 'pred', departamento, sexo)),
+            'historico': _registros(obtener_grupo(self.indice, 'hist', departamento, sexo))
+        }
+
+    def _año(self, parametros):
+        año = _entero(_requerido(parametros, 'anio'), 'anio')
+        departamento, sexo = _requerido(parametros, 'departamento'), _requerido(parametros, 'sexo')
+        filas = obtener_año(self.indice, 'pred', año, departamento, sexo)
+        if filas.empty:
+            raise ErrorConsulta("No hay datos para la combinación seleccionada", 404)
+        return _registros(filas)[0]
+
+    def _alertas(self, parametros):
+        datos = self.indice['pred']['datos']
+        mascara = datos['Alerta'].to_numpy()
+        if 'anio' in parametros:
+            mascara = mascara & (datos['Anio'].to_numpy() == _entero(parametros['anio'], 'anio'))
+        for columna, nombre in [('Departamento', 'departamento'), ('Sexo', 'sexo')]:
+            if nombre in parametros:
+                mascara = mascara & (datos[columna] == parametros[nombre]).to_numpy()
+        return _registros(datos[mascara])
+
+    def _totales(self, parametros):
+        departamento, sexo = parametros.get('departamento', TOTAL), parametros.get('sexo', TOTAL)
+        try:
+            totales = totales_por_año(self.cubo, departamento, sexo)
+        except KeyError:
+            raise ErrorConsulta("No hay datos para la combinación seleccionada", 404) from None
+        return _registros(totales.reset_index())
+
+
+def _requerido(parametros, nombre):
+    if nombre not in parametros:
+        raise ErrorConsulta(f"Falta el parámetro '{nombre}'")
+    return parametros[nombre]
+
+
+def _entero(valor, nombre):
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorConsulta(f"El parámetro '{nombre}' debe ser un entero") from None
+
+
+def _registros(df):
+    """Filas como diccionarios con tipos nativos (flotantes a un decimal y NaN como null)"""
+    flotantes = df.select_dtypes('float').columns
+    if len(flotantes):
+        df = df.astype({c: 'float64' for c in flotantes}).round({c: 1 for c in flotantes})
+        df = df.astype({c: object for c in flotantes}).where(df.notna(), None)
+    return df.to_dict('records')
+
+
+def _a_json(contenido):
+    return json.dumps(contenido, ensure_ascii=False, default=str).encode('utf-8')
+
+
+async def _atender(servicio, lector, escritor):
+    """Atiende una conexión HTTP/1.1 (con keep-alive) hasta que el cliente la cierre"""
+    try:
+        while True:
+            try:
+                cabecera = await lector.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            lineas = cabecera.decode('latin-1').split('\r\n')
+            partes = lineas[0].split()
+            metodo = partes[0] if partes else ''
+            encabezados = dict(
+                (nombre.strip().lower(), valor.strip())
+                for nombre, _, valor in (linea.partition(':') for linea in lineas[1:] if linea)
+            )
+            mantener = encabezados.get('connection', '').lower() != 'close' and partes[-1:] == ['HTTP/1.1']
+
+            try:
+                if len(partes) != 3:
+                    # Sin línea de petición válida no se puede seguir leyendo la conexión
+                    mantener = False
+                    raise ErrorConsulta("Petición mal formada")
+                if metodo not in ('GET', 'HEAD'):
+                    raise ErrorConsulta("Solo se admite GET", 405)
+                url = urlsplit(partes[1])
+                parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                estado, cuerpo = 200, servicio.responder(url.path.rstrip('/') or '/', parametros)
+            except ErrorConsulta as e:
+                estado, cuerpo = e.estado, _a_json({'error': str(e)})
+            except Exception as e:
+                # Cualquier otro fallo también se responde, sin cortar la conexión en silencio
+                estado, cuerpo = 500, _a_json({'error': f"Error interno: {type(e).__name__}: {e}"})
+
+            escritor.write(
+                f"HTTP/1.1 {estado} {_ESTADOS_HTTP[estado]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1')
+            )
+            if metodo != 'HEAD':
+                escritor.write(cuerpo)
+            await escritor.drain()
+            if not mantener:
+                break
+    finally:
+        escritor.close()
+
+
+async def servir(servicio, host='127.0.0.1', puerto=8765):
+    servidor = await asyncio.start_server(
+        lambda lector, escritor: _atender(servicio, lector, escritor), host, puerto, limit=_MAX_CABECERA
+    )
+    print(f"🌐 Servicio de consultas en http://{host}:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de consultas de predicciones de VIH")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--predicciones', default=RUTA_PREDICCIONES)
+    parser.add_argument('--historico', default=RUTA_HISTORICO)
+    args = parser.parse_args()
+
+    df_pred, df_hist = cargar_datos(args.predicciones, args.historico)
+    servicio = ServicioConsultas(df_pred, df_hist)
+    try:
+        asyncio.run(servir(servicio, args.host, args.puerto))
+    except KeyboardInterrupt:
+        print("\n👋 Servicio detenido")
+
+
+if __name__ == "__main__":
+    main()